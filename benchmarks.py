@@ -0,0 +1,358 @@
+# benchmarks.py
+# Micro-benchmarks for the hot paths of the processing engine.
+#
+# Usage:
+#   python benchmarks.py harvest [folder]   Per-document harvest time, legacy vs compiled patterns
+#   python benchmarks.py match [--rows N] [--files N] [--legacy-rows N]
+#                                           Excel row matching, linear scan vs StemMatcher index
+#   python benchmarks.py excel [--rows N]   Excel update wall time and peak memory, full load vs two-phase
+#   python benchmarks.py generate [--rows N]
+#                                           generate_excel save time and file size for a ServiceNow import
+#   python benchmarks.py startup [--repeat N]
+#                                           GUI module import time, deferred vs eager engine load
+import argparse
+import importlib
+import multiprocessing
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from config import BASE_DIR, MODEL_PATTERNS, EXCLUSION_PATTERNS
+
+SAMPLE_SET_DIR = BASE_DIR / "Sample_Set"
+
+def _timed(fn, *args, repeat=5):
+    """Returns (best wall time in seconds, result) over `repeat` calls."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def _summarize(label, seconds):
+    ms = [s * 1000 for s in seconds]
+    print(f"{label:<12} mean {statistics.mean(ms):8.3f} ms   median {statistics.median(ms):8.3f} ms   "
+          f"max {max(ms):8.3f} ms   total {sum(ms):9.1f} ms")
+
+# --- HARVEST ---
+
+def load_sample_documents(folder):
+    """
+    Collects (filename, text) pairs to harvest: .txt review files and PDFs in `folder`, plus one
+    document per row of any .xlsx in it (the row's cells joined, keyed by its attachment name).
+    """
+    folder = Path(folder)
+    docs = []
+    for txt in sorted(folder.glob("*.txt")):
+        docs.append((txt.stem + ".pdf", txt.read_text(encoding="utf-8", errors="ignore")))
+    pdfs = sorted(folder.glob("*.pdf"))
+    if pdfs:
+        from ocr_utils import extract_text_from_pdf
+        docs.extend((pdf.name, extract_text_from_pdf(pdf)) for pdf in pdfs)
+    for xlsx in sorted(folder.glob("*.xlsx")):
+        import openpyxl
+        workbook = openpyxl.load_workbook(xlsx, read_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [str(h) for h in next(rows, [])]
+        name_col = headers.index("Description") if "Description" in headers else 0
+        for row in rows:
+            cells = [str(c) for c in row if c not in (None, "")]
+            if cells:
+                docs.append((str(row[name_col] or xlsx.stem), "\n".join(cells)))
+        workbook.close()
+    return docs
+
+def legacy_combined_patterns(pattern_name, default_patterns):
+    """The pre-registry pattern loader: re-imports custom_patterns on every call."""
+    custom_patterns = []
+    try:
+        custom_mod = importlib.import_module("custom_patterns")
+        importlib.reload(custom_mod)
+        custom_patterns = getattr(custom_mod, pattern_name, [])
+    except (ImportError, SyntaxError):
+        pass
+    return custom_patterns + [p for p in default_patterns if p not in custom_patterns]
+
+def legacy_harvest_models(text, filename):
+    """The pre-compilation harvester: reload custom patterns and re.findall each pattern per document."""
+    from data_harvesters import clean_model_string
+    models = set()
+    patterns = legacy_combined_patterns("MODEL_PATTERNS", MODEL_PATTERNS)
+    for content in [text, filename.replace("_", " ")]:
+        for p in patterns:
+            for match in re.findall(p, content, re.IGNORECASE):
+                if not any(e.lower() in match.lower() for e in EXCLUSION_PATTERNS):
+                    models.add(clean_model_string(match))
+    return sorted(models)
+
+def bench_harvest(folder):
+    from data_harvesters import harvest_models
+    docs = load_sample_documents(folder)
+    if not docs:
+        print(f"No documents found in {folder}")
+        return 1
+    print(f"Harvesting {len(docs)} documents from {folder}\n")
+    legacy, compiled, differences = [], [], 0
+    for filename, text in docs:
+        t_old, old = _timed(legacy_harvest_models, text, filename)
+        t_new, new = _timed(harvest_models, text, filename)
+        legacy.append(t_old)
+        compiled.append(t_new)
+        if old != new:
+            differences += 1
+            print(f"  differs: {filename}\n    legacy:   {old}\n    compiled: {new}")
+    _summarize("legacy", legacy)
+    _summarize("compiled", compiled)
+    print(f"\nSpeed-up: {sum(legacy) / max(sum(compiled), 1e-9):.1f}x   documents with different output: {differences}")
+    return 0
+
+# --- ROW MATCHING ---
+
+def synthetic_match_data(rows, files, seed=1):
+    """
+    Builds `files` PDF names shaped like the real QA/SB attachments and `rows` ServiceNow-style
+    short descriptions, roughly a third of which mention one of the files.
+    """
+    rng = random.Random(seed)
+    filenames = []
+    for i in range(files):
+        kind = rng.choice(["QA", "QA", "SB"])
+        suffix = rng.choice(["", " LEAFLET_2", f" {rng.choice(['E', 'J'])}{rng.randint(1, 99)}"])
+        filenames.append(f"{kind}_{20000 + i}_E{rng.randint(10, 999):03d}{suffix}.pdf")
+    words = "firmware update error code paper jam toner fuser service bulletin model support release".split()
+    descriptions = []
+    for _ in range(rows):
+        text = " ".join(rng.choices(words, k=rng.randint(6, 14)))
+        if rng.random() < 0.33:
+            text = f"{Path(rng.choice(filenames)).stem} {text}"
+        descriptions.append(text)
+    return descriptions, filenames
+
+def legacy_match(descriptions, filenames):
+    """The original update loop: test every file's stem against every row, keep the first hit."""
+    matched = []
+    for desc in descriptions:
+        hit = None
+        for filename in filenames:
+            if Path(filename).stem in desc:
+                hit = filename
+                break
+        matched.append(hit)
+    return matched
+
+def indexed_match(descriptions, filenames):
+    from excel_updater import StemMatcher
+    matcher = StemMatcher(filenames)
+    return [matcher.match(desc) for desc in descriptions]
+
+def bench_match(rows, files, legacy_rows=2000):
+    descriptions, filenames = synthetic_match_data(rows, files)
+    print(f"Matching {rows} rows against {files} files\n")
+    # The linear scan takes minutes at full size, so it is timed on a sample and scaled up.
+    sample = descriptions[:legacy_rows] if legacy_rows else descriptions
+    t_old, old = _timed(legacy_match, sample, filenames, repeat=1)
+    t_old *= len(descriptions) / max(len(sample), 1)
+    t_new, new = _timed(indexed_match, descriptions, filenames, repeat=3)
+    clean = sum(1 for m in new if len(m) == 1)
+    ambiguous = sum(1 for m in new if len(m) > 1)
+    differences = sum(1 for o, n in zip(old, new) if len(n) == 1 and o != n[0])
+    extrapolated = f"   (extrapolated from {len(sample)} rows)" if len(sample) < len(descriptions) else ""
+    print(f"{'linear scan':<12} {t_old * 1000:10.1f} ms{extrapolated}")
+    print(f"{'indexed':<12} {t_new * 1000:10.1f} ms   (automaton build included)")
+    print(f"\nSpeed-up: {t_old / max(t_new, 1e-9):.1f}x   matched rows: {clean}   ambiguous: {ambiguous}   "
+          f"rows where the first-hit scan picked a different file: {differences}")
+    return 0
+
+# --- EXCEL UPDATE ---
+
+def generate_kb_workbook(path, rows, files, seed=1):
+    """Writes a kb_knowledge-shaped workbook of `rows` rows whose descriptions mention the synthetic files."""
+    import openpyxl
+    from config import DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME
+    descriptions, _ = synthetic_match_data(rows, files, seed)
+    rng = random.Random(seed)
+    # A normal (not write-only) workbook, so strings are shared and the sheet records its
+    # dimensions, as in a file saved by Excel.
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Page 1"
+    sheet.append(["Number", DESCRIPTION_COLUMN_NAME, "Knowledge base", "Category", META_COLUMN_NAME, AUTHOR_COLUMN_NAME, "Updated"])
+    for i, desc in enumerate(descriptions):
+        sheet.append([f"KB{1000000 + i}", desc, "IT", rng.choice(["Printers", "MFP", "Firmware"]), None, None, "2024-05-01 10:00:00"])
+    workbook.save(path)
+
+def synthetic_results(files, seed=1):
+    """Fake processing results for the files named by `synthetic_match_data`."""
+    _, filenames = synthetic_match_data(0, files, seed)
+    rng = random.Random(seed)
+    return {name: {"models": "ECOSYS M2040dn, TASKalfa 3501i", "author": "", "status": rng.choice(["Pass", "Needs Review"]),
+                   "ocr_used": rng.random() < 0.2} for name in filenames}
+
+def legacy_update_workbook(source, destination, results):
+    """The pre-change update: full-mode load, then separate passes to write, fill, and size columns."""
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+    from config import DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME, STATUS_COLUMN_NAME
+    from excel_updater import StemMatcher, STATUS_FILLS, format_status
+    workbook = openpyxl.load_workbook(source)
+    sheet = workbook.active
+    headers = [c.value for c in sheet[1]]
+    if STATUS_COLUMN_NAME not in headers:
+        sheet.cell(row=1, column=len(headers) + 1).value = STATUS_COLUMN_NAME
+        headers.append(STATUS_COLUMN_NAME)
+    cols = {h: headers.index(h) + 1 for h in [DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME, STATUS_COLUMN_NAME]}
+    # Matching uses the index so the comparison isolates the workbook I/O.
+    matcher = StemMatcher(results)
+    for row in sheet.iter_rows(min_row=2):
+        matches = matcher.match(str(row[cols[DESCRIPTION_COLUMN_NAME]-1].value))
+        if len(matches) == 1:
+            data = results[matches[0]]
+            row[cols[META_COLUMN_NAME]-1].value = data["models"]
+            row[cols[AUTHOR_COLUMN_NAME]-1].value = data["author"]
+            row[cols[STATUS_COLUMN_NAME]-1].value = format_status(data)
+    for row in sheet.iter_rows(min_row=2):
+        status_val = str(row[cols[STATUS_COLUMN_NAME]-1].value)
+        fill = STATUS_FILLS.get(status_val.replace(" (OCR)", "").strip())
+        if fill:
+            for cell in row:
+                cell.fill = fill
+        if "(OCR)" in status_val:
+            row[cols[STATUS_COLUMN_NAME]-1].fill = STATUS_FILLS["OCR"]
+    for i, col in enumerate(sheet.columns, 1):
+        max_len = max((len(str(c.value)) for c in col if c.value), default=0)
+        sheet.column_dimensions[get_column_letter(i)].width = (max_len + 2) if max_len < 60 else 60
+    workbook.save(destination)
+
+def _measure_in_child(name, source, destination, results, conn):
+    from excel_updater import update_workbook
+    fn = {
+        "full load": legacy_update_workbook,
+        "two-phase": lambda *args: update_workbook(*args, streaming=False),
+        "streaming": lambda *args: update_workbook(*args, streaming=True),
+    }[name]
+    start = time.perf_counter()
+    fn(source, destination, results)
+    elapsed = time.perf_counter() - start
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == "darwin" else peak * 1024
+        label = "peak RSS"
+    except ImportError:
+        # No getrusage on Windows: time a second, traced run for the Python heap peak instead.
+        tracemalloc.start()
+        fn(source, destination, results)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        label = "peak heap"
+    conn.send((elapsed, peak, label, Path(destination).stat().st_size))
+    conn.close()
+
+def bench_excel(rows, files):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "kb_knowledge.xlsx"
+        # Generation and each variant run in fresh processes: on Linux a child inherits its
+        # parent's peak RSS, so a large parent would hide the numbers being measured.
+        context = multiprocessing.get_context("spawn")
+        print(f"Generating a {rows}-row workbook...")
+        generator = context.Process(target=generate_kb_workbook, args=(source, rows, files))
+        generator.start()
+        generator.join()
+        results = synthetic_results(files)
+        print(f"Source size: {source.stat().st_size / 1e6:.1f} MB, {len(results)} results\n")
+        for name in ("full load", "two-phase", "streaming"):
+            parent, child = context.Pipe(duplex=False)
+            process = context.Process(target=_measure_in_child, args=(name, source, Path(tmp) / f"{name}.xlsx", results, child))
+            process.start()
+            elapsed, peak, label, size = parent.recv()
+            process.join()
+            print(f"{name:<12} {elapsed:8.1f} s   {label} {peak / 1e6:8.1f} MB   output {size / 1e6:6.1f} MB")
+    return 0
+
+# --- IMPORT FILE GENERATION ---
+
+def synthetic_import_rows(rows, seed=3):
+    rng = random.Random(seed)
+    statuses = ["Success", "Needs Review", "OCR Required", "Failed"]
+    return [{"Short description": f"QA_{20000 + i} " + "word " * rng.randint(3, 30), "Author": "A",
+             "Meta": "ECOSYS M2040dn, TASKalfa 3501i", "file_name": f"QA_{20000 + i}.pdf",
+             "processing_status": rng.choice(statuses)} for i in range(rows)]
+
+def bench_generate(rows):
+    from excel_generator import generate_excel
+    data = synthetic_import_rows(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "import.xlsx"
+        elapsed, _ = _timed(generate_excel, data, output, None, repeat=1)
+        print(f"generate_excel, {rows} rows: {elapsed:.1f} s   output {output.stat().st_size / 1e6:.2f} MB")
+    return 0
+
+# --- STARTUP ---
+
+HEAVY_MODULES = ("fitz", "cv2", "numpy", "pytesseract", "openpyxl", "pandas", "PIL")
+
+# Each probe runs in a fresh interpreter and prints its elapsed seconds and the heavy modules it loaded.
+STARTUP_PROBES = {
+    "deferred": "import kyo_qa_tool_app",
+    # What the window used to wait for: the engine and its OCR/Excel libraries plus the Tesseract probe.
+    "eager": "import kyo_qa_tool_app, processing_engine, excel_updater, fitz, cv2, numpy, pytesseract, ocr_utils; ocr_utils.tesseract_available()",
+}
+
+def _run_startup_probe(code):
+    script = (
+        "import sys, time; t = time.perf_counter(); " + code + "; "
+        "print('STARTUP', time.perf_counter() - t, *(m for m in " + repr(HEAVY_MODULES) + " if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout
+    fields = next(line for line in out.splitlines() if line.startswith("STARTUP ")).split()
+    return float(fields[1]), fields[2:]
+
+def bench_startup(repeat):
+    """Import cost before the window can appear. The first run of each probe also warms the OS file cache."""
+    for name, code in STARTUP_PROBES.items():
+        _run_startup_probe(code)
+        times, modules = [], []
+        for _ in range(repeat):
+            elapsed, modules = _run_startup_probe(code)
+            times.append(elapsed * 1000)
+        print(f"{name:<9} median {statistics.median(times):7.0f} ms   min {min(times):7.0f} ms   heavy modules: {', '.join(modules) or 'none'}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KYO QA Tool performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    harvest = sub.add_parser("harvest", help="per-document harvest time, legacy vs compiled patterns")
+    harvest.add_argument("folder", nargs="?", default=str(SAMPLE_SET_DIR))
+    match = sub.add_parser("match", help="Excel row matching, linear scan vs StemMatcher index")
+    match.add_argument("--rows", type=int, default=30000)
+    match.add_argument("--files", type=int, default=3000)
+    match.add_argument("--legacy-rows", type=int, default=2000, help="rows to time the linear scan on (0 = all)")
+    excel = sub.add_parser("excel", help="Excel update wall time and peak memory: full load, two-phase and streaming")
+    excel.add_argument("--rows", type=int, default=100000)
+    excel.add_argument("--files", type=int, default=3000)
+    generate = sub.add_parser("generate", help="generate_excel save time and file size")
+    generate.add_argument("--rows", type=int, default=20000)
+    startup = sub.add_parser("startup", help="GUI module import time, deferred vs eager engine load")
+    startup.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.command == "harvest":
+        return bench_harvest(args.folder)
+    if args.command == "match":
+        return bench_match(args.rows, args.files, args.legacy_rows)
+    if args.command == "excel":
+        return bench_excel(args.rows, args.files)
+    if args.command == "generate":
+        return bench_generate(args.rows)
+    if args.command == "startup":
+        return bench_startup(args.repeat)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
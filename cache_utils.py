@@ -0,0 +1,185 @@
+# cache_utils.py
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from config import CACHE_DIR, CACHE_MAX_BYTES, CACHE_MAX_AGE_DAYS, EXTRACTOR_VERSION
+from logging_utils import setup_logger, log_info, log_warning
+
+logger = setup_logger("cache_utils")
+
+def file_digest(path, chunk_size=1024 * 1024) -> str:
+    """Returns a BLAKE2b digest of the file's bytes, so identical PDFs share a key regardless of name."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+def partial_digest(path, size, edge_bytes=64 * 1024) -> str:
+    """Digest of the first and last `edge_bytes` of a file; cheap pre-filter for file_digest."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(edge_bytes))
+        if size > 2 * edge_bytes:
+            f.seek(-edge_bytes, os.SEEK_END)
+            h.update(f.read(edge_bytes))
+    return h.hexdigest()
+
+class DuplicateFinder:
+    """
+    Detects byte-identical files as they are added, one at a time. A file is only compared
+    with earlier files of the same size, first by a partial digest of its head and tail and
+    then, if that still collides, by a full digest, so a batch without duplicates costs one
+    stat per file. Digests are computed lazily and kept for later comparisons.
+    """
+
+    def __init__(self):
+        self._by_size = {}
+        self._partial = {}
+        self._full = {}
+
+    def add(self, path):
+        """Returns the earlier file `path` duplicates, or None if its content is new. Unreadable files count as new."""
+        try:
+            size = os.path.getsize(path)
+            candidates = self._by_size.setdefault(size, [])
+            if candidates:
+                edges = self._digest(self._partial, path, lambda p: partial_digest(p, size))
+                for other in candidates:
+                    if self._digest(self._partial, other, lambda p: partial_digest(p, size)) != edges:
+                        continue
+                    if self._digest(self._full, other, file_digest) == self._digest(self._full, path, file_digest):
+                        return other
+        except OSError:
+            return None
+        candidates.append(path)
+        return None
+
+    @staticmethod
+    def _digest(memo, path, compute):
+        if path not in memo:
+            memo[path] = compute(path)
+        return memo[path]
+
+class ExtractionCache:
+    """
+    Content-addressed, two-layer cache of per-PDF processing results.
+
+    The text layer holds the extracted text per page and is keyed on a digest of the PDF
+    bytes plus EXTRACTOR_VERSION. The harvest layer holds the final result and is keyed on
+    the same digest plus a fingerprint of the active pattern set. A pattern edit therefore
+    only invalidates the harvest layer, and reruns re-apply the regexes to cached text
+    instead of running OCR again. Reads refresh the entry's mtime, which `evict` uses as
+    the LRU clock when enforcing the size and age limits.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, pattern_version="", max_bytes=CACHE_MAX_BYTES, max_age_days=CACHE_MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self.text_version = f"v{EXTRACTOR_VERSION}"
+        self.harvest_version = f"v{EXTRACTOR_VERSION}-{pattern_version}" if pattern_version else f"v{EXTRACTOR_VERSION}"
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.harvest_hits = 0
+        self.text_hits = 0
+        self.misses = 0
+
+    def text_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}_text_{self.text_version}.json"
+
+    def harvest_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}_harvest_{self.harvest_version}.json"
+
+    def get_text(self, digest: str):
+        """Returns the cached text layer ({"pages": [...], ...}) for `digest`, or None."""
+        data = self._read(self.text_path(digest))
+        return data if data is not None and "pages" in data else None
+
+    def put_text(self, digest: str, data: dict) -> None:
+        self._write(self.text_path(digest), data)
+
+    def get_harvest(self, digest: str):
+        """Returns the cached harvest result for `digest`, or None."""
+        data = self._read(self.harvest_path(digest))
+        return data if data is not None and "status" in data else None
+
+    def put_harvest(self, digest: str, data: dict) -> None:
+        self._write(self.harvest_path(digest), data)
+
+    def _read(self, path: Path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            log_warning(logger, f"Discarding unreadable cache entry {path.name}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write(self, path: Path, data: dict) -> None:
+        """Writes an entry atomically so a concurrent reader never sees a partial file."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def record(self, layer) -> None:
+        """Tallies which layer (if any) served a file. Results from worker processes are counted by the parent job."""
+        if layer == "harvest":
+            self.harvest_hits += 1
+        elif layer == "text":
+            self.text_hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        return {"harvest_hits": self.harvest_hits, "text_hits": self.text_hits, "misses": self.misses}
+
+    def evict(self) -> int:
+        """Drops entries older than max_age_days, then least-recently-used ones until under max_bytes."""
+        if not self.cache_dir.exists():
+            return 0
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        removed = 0
+        cutoff = time.time() - self.max_age_days * 86400
+        kept = []
+        for mtime, size, path in entries:
+            if mtime < cutoff:
+                removed += self._remove(path)
+            else:
+                kept.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in kept)
+        for mtime, size, path in sorted(kept):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        if removed:
+            log_info(logger, f"Evicted {removed} cache entries ({total / (1024 * 1024):.1f} MB kept)")
+        return removed
+
+    @staticmethod
+    def _remove(path) -> int:
+        try:
+            path.unlink()
+            return 1
+        except OSError:
+            return 0
@@ -0,0 +1,200 @@
+# cli_runner.py
+# Headless entry point: runs the same processing job as the GUI without importing tkinter,
+# for scheduled runs on machines without a display.
+#
+# Usage:
+#   python cli_runner.py --excel KB.xlsx --folder PDFs [--workers N] [--progress console|jsonl|quiet]
+#   python cli_runner.py --excel KB.xlsx --files a.pdf b.pdf
+#   python cli_runner.py --rerun-flagged output/cloned_KB_<timestamp>.xlsx
+#
+# Exit codes:
+#   0  job complete, every file passed
+#   1  job failed (bad input, locked workbook, unexpected error)
+#   2  invalid arguments
+#   3  job complete, but some files need review or failed
+#   130 cancelled with Ctrl+C
+import argparse
+import contextlib
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from pathlib import Path
+
+from config import CACHE_DIR
+
+# Project modules set up logging when first imported; creating its console handler here
+# points it at stderr, so stdout carries only the progress output (and stays valid JSON lines).
+with contextlib.redirect_stdout(sys.stderr):
+    from file_utils import ensure_folders
+    from processing_engine import run_processing_job
+    from results_sidecar import read_sidecar, sidecar_path_for
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_NEEDS_REVIEW = 3
+EXIT_CANCELLED = 130
+
+class ProgressSink:
+    """
+    Stands in for the GUI's response queue: the engine `put`s its messages here. Tallies
+    the per-file counters and remembers the finish status and result path for the summary.
+    """
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.counters = {}
+        self.result_path = None
+        self.status = None
+
+    def put(self, msg):
+        mtype = msg.get("type")
+        if mtype == "batch":
+            for name, delta in msg.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + delta
+        elif mtype == "increment_counter":
+            self._count(msg.get("counter"))
+        elif mtype == "file_complete":
+            self._count(msg.get("status", "").lower().replace(" ", "_"))
+        elif mtype == "result_path":
+            self.result_path = msg.get("path")
+        self.emit(msg)
+        if mtype == "finish":
+            self.status = msg.get("status", "Complete")
+
+    def _count(self, name):
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def emit(self, msg):
+        pass
+
+class ConsoleSink(ProgressSink):
+    """Human-readable progress: log lines as they arrive plus a running file count."""
+
+    def emit(self, msg):
+        mtype = msg.get("type")
+        if mtype == "batch":
+            for tag, text in msg.get("logs", []):
+                self._line(tag, text)
+            progress = msg.get("progress")
+            if progress:
+                self._line("progress", f"{progress['current']}/{progress['total']} files")
+        elif mtype == "log":
+            self._line(msg.get("tag", "info"), msg.get("msg", ""))
+        elif mtype == "result_path":
+            self._line("info", f"Result: {msg.get('path')}")
+        elif mtype == "finish":
+            self._line("info", f"Job finished: {msg.get('status')}")
+
+    def _line(self, tag, text):
+        self.stream.write(f"{time.strftime('%H:%M:%S')} {tag.upper():<8} {text}\n")
+        self.stream.flush()
+
+class JsonLinesSink(ProgressSink):
+    """Machine-readable progress: every engine message as one JSON object per line."""
+
+    def emit(self, msg):
+        self.stream.write(json.dumps({"time": round(time.time(), 3), **msg}, default=str) + "\n")
+        self.stream.flush()
+
+SINKS = {"console": ConsoleSink, "jsonl": JsonLinesSink, "quiet": ProgressSink}
+
+def flagged_files(result_path) -> list:
+    """PDFs marked "Needs Review" in the results sidecar of a previous run's workbook."""
+    sidecar = sidecar_path_for(result_path)
+    if not sidecar.exists():
+        raise FileNotFoundError(f"No results sidecar for {Path(result_path).name} (expected {sidecar.name})")
+    return [row["source_path"] for row in read_sidecar(sidecar) if row.get("status") == "Needs Review" and row.get("source_path")]
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Update a knowledge-base workbook from QA/service PDFs without the GUI.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--folder", help="folder of PDFs (searched recursively)")
+    source.add_argument("--files", nargs="+", help="individual PDF files")
+    source.add_argument("--rerun-flagged", metavar="RESULT_XLSX", help="re-process the files flagged for review in a previous result workbook, updating it in place")
+    parser.add_argument("--excel", help="workbook to clone and update (required unless --rerun-flagged)")
+    parser.add_argument("--workers", type=int, help="worker processes (0 = one per CPU core; default from config)")
+    parser.add_argument("--page-workers", type=int, help="OCR page threads per worker (default from config)")
+    parser.add_argument("--ignore-cache", action="store_true", default=None, help="re-extract every file instead of reusing cached results (cached text is still used)")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help=f"extraction cache location (default {CACHE_DIR})")
+    parser.add_argument("--fill-blanks", action="store_true", default=None, help="only fill rows whose Meta cell is empty")
+    parser.add_argument("--include", nargs="+", metavar="GLOB", help="file globs to include when scanning --folder")
+    parser.add_argument("--exclude", nargs="+", metavar="GLOB", help="file or folder globs to skip when scanning --folder")
+    parser.add_argument("--min-size", type=int, metavar="BYTES", help="skip files smaller than this")
+    parser.add_argument("--max-size", type=int, metavar="BYTES", help="skip files larger than this")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false", default=None, help="do not descend into subfolders")
+    parser.add_argument("--progress", choices=sorted(SINKS), default="console", help="progress output on stdout (default console)")
+    return parser
+
+def build_job(args) -> dict:
+    if args.rerun_flagged:
+        files = flagged_files(args.rerun_flagged)
+        job = {"excel_path": args.rerun_flagged, "input_path": files, "is_rerun": True}
+    else:
+        job = {"excel_path": args.excel, "input_path": args.files or args.folder}
+    options = {
+        "workers": args.workers, "page_workers": args.page_workers, "ignore_cache": args.ignore_cache,
+        "cache_dir": args.cache_dir, "include": args.include, "exclude": args.exclude,
+        "min_size": args.min_size, "max_size": args.max_size, "recursive": args.recursive,
+        "fill_blanks_only": args.fill_blanks,
+    }
+    job.update({key: value for key, value in options.items() if value is not None})
+    return job
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.rerun_flagged and not args.excel:
+        parser.error("--excel is required unless --rerun-flagged is given")
+
+    try:
+        job = build_job(args)
+    except (OSError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    if not Path(job["excel_path"]).is_file():
+        print(f"Error: workbook not found: {job['excel_path']}", file=sys.stderr)
+        return EXIT_ERROR
+    if args.rerun_flagged and not job["input_path"]:
+        print("No flagged files to re-run.", file=sys.stderr)
+        return EXIT_OK
+
+    ensure_folders()
+    sink = SINKS[args.progress]()
+    cancel_event, pause_event, done = threading.Event(), threading.Event(), threading.Event()
+
+    def run():
+        try:
+            run_processing_job(job, sink, cancel_event, pause_event)
+        finally:
+            done.set()
+
+    # The job runs in a thread so Ctrl+C reaches this one; waiting on an Event (rather than
+    # Thread.join) survives being interrupted. Libraries imported during the job may print
+    # notices, so stdout is redirected too; the sink keeps its own reference to it.
+    with contextlib.redirect_stdout(sys.stderr):
+        threading.Thread(target=run, daemon=True).start()
+        try:
+            while not done.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            print("Cancelling: letting running files finish (Ctrl+C again to abort)...", file=sys.stderr)
+            cancel_event.set()
+            try:
+                while not done.wait(0.5):
+                    pass
+            except KeyboardInterrupt:
+                return EXIT_CANCELLED
+
+    if sink.status == "Cancelled" or cancel_event.is_set():
+        return EXIT_CANCELLED
+    if sink.status != "Complete":
+        return EXIT_ERROR
+    if sink.counters.get("needs_review") or sink.counters.get("fail"):
+        return EXIT_NEEDS_REVIEW
+    return EXIT_OK
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
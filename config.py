@@ -43,4 +43,69 @@ STANDARDIZATION_RULES = {"TASKalfa-": "TASKalfa ", "ECOSYS-": "ECOSYS "}
 META_COLUMN_NAME = "Meta"
 AUTHOR_COLUMN_NAME = "Author"
 DESCRIPTION_COLUMN_NAME = "Short description"
-STATUS_COLUMN_NAME = "Processing Status"
\ No newline at end of file
+STATUS_COLUMN_NAME = "Processing Status"
+# --- PERFORMANCE ---
+# Number of worker processes used by run_processing_job.
+# 0 = one worker per CPU core, 1 = process files sequentially in the job thread.
+PROCESSING_WORKERS = 0
+# Pages of a single document OCR'd concurrently per worker.
+# 0 = split the CPU cores evenly between file workers, so the two levels never oversubscribe.
+OCR_PAGE_WORKERS = 0
+# Harvest-driven OCR: re-run the harvesters after each OCR'd page and stop as soon as models and
+# a QA/SB number are found. EARLY_EXIT_MAX_OCR_PAGES caps OCR'd pages per document (0 = no cap).
+EARLY_EXIT_OCR = False
+EARLY_EXIT_MAX_OCR_PAGES = 3
+# Adaptive OCR resolution: OCR each page at the first DPI of the ladder and re-render at the next
+# step only while Tesseract's mean word confidence stays below OCR_MIN_CONFIDENCE. If the harvest
+# still finds no models, the engine re-OCRs the low-DPI pages at the top of the ladder.
+ADAPTIVE_OCR_DPI = False
+OCR_DPI_LADDER = (150, 300)
+OCR_MIN_CONFIDENCE = 70
+DEFAULT_OCR_DPI = 300
+
+# --- EXTRACTION CACHE ---
+# Bump EXTRACTOR_VERSION whenever text extraction changes so stale cache entries stop matching.
+EXTRACTOR_VERSION = "4"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_MAX_AGE_DAYS = 30
+
+# --- EXCEL OUTPUT ---
+# Column widths follow the longest value in each column, capped at 60 characters in the
+# updated workbook. 0 = measure every row; N = size columns from the first N data rows only.
+EXCEL_WIDTH_SAMPLE_ROWS = 0
+# Sheets below EXCEL_STREAMING_WRITE_ROWS data rows are updated by loading the workbook
+# normally and changing only the matched cells, which keeps formatting, filters and validation
+# but holds the whole workbook in memory (about 3 KB per row). Larger sheets are rewritten
+# through a write-only workbook at about a quarter of the peak memory; that keeps only cell values,
+# header styles and the active sheet's column widths (number formats, fonts, freeze panes,
+# filters, validation and other sheets' widths are lost). 0 = never stream.
+EXCEL_STREAMING_WRITE_ROWS = 50000
+# Results sidecar: a <workbook>_results.csv beside the output workbook, one row per file,
+# written as files complete. RESULTS_SIDECAR_PARQUET also writes a .parquet copy at the end
+# (needs pyarrow or fastparquet).
+RESULTS_SIDECAR = True
+RESULTS_SIDECAR_PARQUET = False
+# Fill-blanks-only: pre-scan the workbook, process only PDFs named by rows whose Meta cell is
+# empty, and leave rows that already have Meta untouched. The GUI checkbox starts from this.
+FILL_BLANKS_ONLY = False
+
+# --- INPUT DISCOVERY ---
+# Folder inputs are walked on a background thread and files are processed as they are found.
+# Globs are case-insensitive and match the file name or its path relative to the folder;
+# an exclude glob that matches a subfolder skips it entirely. Sizes in bytes, 0 = no limit.
+DISCOVERY_RECURSIVE = True
+DISCOVERY_INCLUDE = ("*.pdf",)
+DISCOVERY_EXCLUDE = ()
+DISCOVERY_MIN_BYTES = 0
+DISCOVERY_MAX_BYTES = 0
+
+# --- PROGRESS EVENTS ---
+# The engine folds per-file log/status/counter messages into one batch event per interval
+# (seconds) so the UI redraws at a bounded rate; 0 sends each message individually.
+# The log panel keeps at most LOG_VIEW_MAX_LINES lines.
+PROGRESS_BATCH_INTERVAL = 0.25
+LOG_VIEW_MAX_LINES = 2000
+
+# Each completed job writes a performance report (per-stage timing percentiles for the
+# processed files plus the Excel update phases) to the logs folder, next to the success log.
+PERFORMANCE_REPORT = True
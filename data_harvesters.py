@@ -1,6 +1,9 @@
 # data_harvesters.py
 import re
-import importlib
+import json
+import hashlib
+import threading
+from pathlib import Path
 from config import (
     MODEL_PATTERNS as DEFAULT_MODEL_PATTERNS,
     QA_NUMBER_PATTERNS as DEFAULT_QA_PATTERNS,
@@ -8,21 +11,148 @@ from config import (
     UNWANTED_AUTHORS,
     STANDARDIZATION_RULES,
 )
+from logging_utils import setup_logger, log_warning
 
-def get_combined_patterns(pattern_name: str, default_patterns: list) -> list:
-    """Safely loads and combines default and custom patterns."""
-    custom_patterns = []
+logger = setup_logger("data_harvesters")
+
+# Bump when harvesting logic changes output for the same patterns, so cached results are redone.
+HARVESTER_VERSION = 3
+
+def combine_patterns(custom_patterns: list, default_patterns: list) -> list:
+    """Custom patterns first, then any defaults they don't already repeat."""
+    return list(custom_patterns) + [p for p in default_patterns if p not in custom_patterns]
+
+class PatternSet:
+    """Compiled form of the combined (custom + default) harvesting rules; matches are taken as `group(0)`."""
+
+    def __init__(self, model_patterns: list, qa_patterns: list):
+        self.model_patterns = list(model_patterns)
+        self.qa_patterns = list(qa_patterns)
+        # One scanner per pattern: a merged alternation would drop matches nested inside another
+        # pattern's match (e.g. "PF-5150" inside "ECOSYS PF-5150").
+        self.model_scanners = [re.compile(p, re.IGNORECASE) for p in self.model_patterns if _is_valid(p)]
+        self.qa_scanners = [re.compile(p, re.IGNORECASE) for p in self.qa_patterns if _is_valid(p)]
+        self.exclusions = [p.lower() for p in EXCLUSION_PATTERNS]
+        payload = json.dumps({
+            "harvester": HARVESTER_VERSION,
+            "models": self.model_patterns,
+            "qa_numbers": self.qa_patterns,
+            "exclusions": EXCLUSION_PATTERNS,
+            "unwanted_authors": UNWANTED_AUTHORS,
+            "standardization": STANDARDIZATION_RULES,
+        }, sort_keys=True)
+        self.fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:10]
+
+    def is_excluded(self, text: str) -> bool:
+        lowered = text.lower()
+        return any(p in lowered for p in self.exclusions)
+
+    def find_models(self, text: str, filename: str) -> list:
+        models = set()
+        for content in [text, filename.replace("_", " ")]:
+            for scanner in self.model_scanners:
+                for match in scanner.finditer(content):
+                    found = match.group(0)
+                    if not self.is_excluded(found):
+                        models.add(clean_model_string(found))
+        return sorted(models)
+
+    def find_qa_number(self, text: str, filename: str) -> str:
+        for content in [filename, text]:
+            for scanner in self.qa_scanners:
+                match = scanner.search(content)
+                if match:
+                    return match.group(0)
+        return ""
+
+def _is_valid(pattern: str) -> bool:
     try:
-        custom_mod = importlib.import_module("custom_patterns")
-        importlib.reload(custom_mod)
-        custom_patterns = getattr(custom_mod, pattern_name, [])
-    except (ImportError, SyntaxError):
-        pass
-    return custom_patterns + [p for p in default_patterns if p not in custom_patterns]
+        re.compile(pattern)
+        return True
+    except re.error:
+        return False
+
+CUSTOM_PATTERNS_PATH = Path(__file__).parent / "custom_patterns.py"
+
+class PatternRegistry:
+    """Owns the active PatternSet so custom_patterns.py is read once per change, not once per document."""
+
+    def __init__(self, path=CUSTOM_PATTERNS_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._current = None
+        self._mtime = None
+        self._listeners = []
+
+    def _mtime_on_disk(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def current(self) -> PatternSet:
+        """Returns the active PatternSet, loading it on first use."""
+        with self._lock:
+            if self._current is None:
+                self.reload()
+            return self._current
+
+    def snapshot(self) -> PatternSet:
+        """Returns an immutable PatternSet for the duration of a job, picking up edits made outside the app."""
+        with self._lock:
+            if self._current is None or self._mtime != self._mtime_on_disk():
+                self.reload()
+            return self._current
+
+    def _read_custom_patterns(self) -> dict:
+        # Executed from source rather than re-imported, so a rewrite within the same second
+        # can never be masked by a stale .pyc.
+        namespace = {}
+        try:
+            exec(compile(self.path.read_text(encoding="utf-8"), str(self.path), "exec"), namespace)
+        except FileNotFoundError:
+            pass
+        except (OSError, SyntaxError) as e:
+            log_warning(logger, f"Could not load {self.path.name}, using default patterns only: {e}")
+            namespace = {}
+        return namespace
+
+    def reload(self) -> PatternSet:
+        """Re-reads custom_patterns.py, rebuilds the PatternSet, and notifies listeners if it changed."""
+        with self._lock:
+            previous = self._current
+            self._mtime = self._mtime_on_disk()
+            custom = self._read_custom_patterns()
+            self._current = PatternSet(
+                combine_patterns(custom.get("MODEL_PATTERNS", []), DEFAULT_MODEL_PATTERNS),
+                combine_patterns(custom.get("QA_NUMBER_PATTERNS", []), DEFAULT_QA_PATTERNS),
+            )
+            listeners = list(self._listeners) if previous is not None and previous.fingerprint != self._current.fingerprint else []
+        for listener in listeners:
+            try:
+                listener(self._current)
+            except Exception as e:
+                log_warning(logger, f"Pattern listener failed: {e}")
+        return self._current
+
+    def add_listener(self, callback) -> None:
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+pattern_registry = PatternRegistry()
+
+def get_pattern_set() -> PatternSet:
+    """Returns the registry's active PatternSet."""
+    return pattern_registry.current()
 
 def is_excluded(text: str) -> bool:
     """Checks if a string contains any of the unwanted exclusion patterns."""
-    return any(p.lower() in text.lower() for p in EXCLUSION_PATTERNS)
+    return get_pattern_set().is_excluded(text)
 
 def clean_model_string(model_str: str) -> str:
     """Applies standardization rules to a found model string."""
@@ -30,22 +160,19 @@ def clean_model_string(model_str: str) -> str:
         model_str = model_str.replace(rule, replacement)
     return model_str.strip()
 
-def harvest_models(text: str, filename: str) -> list:
+def harvest_models(text: str, filename: str, patterns: PatternSet = None) -> list:
     """Finds all unique models from text and filename, respecting exclusions."""
-    models = set()
-    patterns = get_combined_patterns("MODEL_PATTERNS", DEFAULT_MODEL_PATTERNS)
-    
-    for content in [text, filename.replace("_", " ")]:
-        for p in patterns:
-            for match in re.findall(p, content, re.IGNORECASE):
-                #==============================================================
-                # --- BUG FIX: Changed to use the correct function name ---
-                #==============================================================
-                if not is_excluded(match): models.add(clean_model_string(match))
-                #==============================================================
-                # --- END OF BUG FIX ---
-                #==============================================================
-    return sorted(list(models))
+    return (patterns or get_pattern_set()).find_models(text, filename)
+
+def harvest_qa_number(text: str, filename: str, patterns: PatternSet = None) -> str:
+    """Returns the first QA/SB number found in the filename or text, or an empty string."""
+    return (patterns or get_pattern_set()).find_qa_number(text, filename)
+
+def is_confident_harvest(text: str, filename: str, patterns: PatternSet = None) -> bool:
+    """True once the extracted text itself yields both models and a QA/SB number, so further OCR can be skipped."""
+    # The filename is left out: a QA_/SB_ name would satisfy the check before any page was read.
+    patterns = patterns or get_pattern_set()
+    return bool(patterns.find_models(text, "")) and bool(patterns.find_qa_number(text, ""))
 
 # --- UPDATED FUNCTION ---
 def harvest_author(text: str) -> str:
@@ -60,9 +187,9 @@ def harvest_author(text: str) -> str:
     return "" # Return empty string if no author is found or if it's unwanted
 # --- END OF UPDATE ---
 
-def harvest_all_data(text: str, filename: str) -> dict:
-    """The main harvester function that aggregates all data."""
-    models_str = ", ".join(harvest_models(text, filename)) or "Not Found"
+def harvest_all_data(text: str, filename: str, patterns: PatternSet = None) -> dict:
+    """The main harvester function that aggregates all data. `patterns` defaults to the registry's active set."""
+    models_str = ", ".join(harvest_models(text, filename, patterns)) or "Not Found"
     # --- UPDATED FUNCTION CALL ---
     author_str = harvest_author(text)
     return {"models": models_str, "author": author_str}
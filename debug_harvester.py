@@ -1,8 +1,8 @@
 # debug_harvester.py
 import sys
 from pathlib import Path
-from ocr_utils import extract_text_from_pdf, TESSERACT_AVAILABLE
-from data_harvesters import harvest_all_data
+from ocr_utils import extract_pdf_pages, join_page_texts, TESSERACT_AVAILABLE
+from data_harvesters import harvest_all_data
 from config import MODEL_PATTERNS
 import time
 
@@ -24,7 +24,8 @@ def test_model_extraction(pdf_path: Path):
     # 2. Extract raw text using the app's own OCR utility
     print(f"\n[Step 2: Extracting Text]")
     start_time = time.time()
-    raw_text = extract_text_from_pdf(pdf_path)
+    extraction = extract_pdf_pages(pdf_path)
+    raw_text = join_page_texts(extraction)
     end_time = time.time()
 
     if not raw_text or not raw_text.strip():
@@ -32,13 +33,15 @@ def test_model_extraction(pdf_path: Path):
         return
 
     print(f"✅ Text extracted in {end_time - start_time:.2f} seconds ({len(raw_text)} characters).")
+    for page in extraction["pages"]:
+        print(f"   - Page {page['page']}: {page['source']} ({len(page['text'])} chars, {page['native_chars']} native)")
 
     # 3. Run the model harvesting logic
     print(f"\n[Step 3: Harvesting Models]")
     print(f"-> Using {len(MODEL_PATTERNS)} patterns from config.py")
     
-    # Use harvest_all_data to extract models and related metadata
-    extracted_data = harvest_all_data(raw_text, pdf_path.name)
+    # Use harvest_all_data to extract models and related metadata
+    extracted_data = harvest_all_data(raw_text, pdf_path.name)
     found_models_str = extracted_data.get("models")
 
     # 4. Print the final results
@@ -63,4 +66,4 @@ if __name__ == "__main__":
     else:
         # Instructions on how to run the script
         print("Usage: python debug_harvester.py \"path/to/your/file.pdf\"")
-        print("\nExample: python debug_harvester.py \"QA_20146_E035 LEAFLET_2.pdf\"")
+        print("\nExample: python debug_harvester.py \"QA_20146_E035 LEAFLET_2.pdf\"")
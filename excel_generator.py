@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import pandas as pd
-from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.formatting.rule import FormulaRule
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
 import openpyxl
 import re
 
+from config import EXCEL_WIDTH_SAMPLE_ROWS
+from excel_utils import ColumnWidthTracker
 from logging_utils import setup_logger, log_info, log_error
 from custom_exceptions import ExcelGenerationError
 
@@ -24,6 +26,11 @@ SUCCESS_FILL = PatternFill(fill_type=None)
 
 
 
+SHEET_NAME = "ServiceNow Import"
+# Rows ExcelWriter sizes columns from when EXCEL_WIDTH_SAMPLE_ROWS asks for every row, which a
+# streaming writer cannot wait for.
+STREAMING_WIDTH_SAMPLE_ROWS = 500
+
 DEFAULT_TEMPLATE_HEADERS = [
     "Active",
     "Article type",
@@ -72,72 +79,161 @@ def sanitize_for_excel(value):
     return value
 
 
-def apply_excel_styles(worksheet, df):
-    log_info(logger, "Applying formatting and conditional coloring...")
-    header_font = Font(bold=True)
-    status_colors = {
-        "Needs Review": NEEDS_REVIEW_FILL,
-        "OCR Required": OCR_FILL,
-        "Failed": FAILED_FILL,
-        "Success": SUCCESS_FILL,
-    }
-
-    for index, data_row in df.iterrows():
-        status = data_row.get("processing_status", "Success")
-        fill_color = status_colors.get(status, SUCCESS_FILL)
-        if fill_color.fill_type:
-            for cell in worksheet[index + 2]:
-                cell.fill = fill_color
-
-    for cell in worksheet[1]:
-        cell.font = header_font
-
-    for row in worksheet.iter_rows(min_row=2):
-        for cell in row:
-            cell.alignment = Alignment(
-                wrap_text=True, vertical="top", horizontal="left"
-            )
-
-    for column_cells in worksheet.columns:
-        try:
-            max_length = max(
-                len(str(cell.value)) for cell in column_cells if cell.value
-            )
-            worksheet.column_dimensions[column_cells[0].column_letter].width = min(
-                (max_length + 2), 70
-            )
-        except (ValueError, TypeError):
-            continue
-
-    # Conditional formatting using the processing_status column if present
-    if "processing_status" in df.columns:
-        status_col_idx = df.columns.get_loc("processing_status") + 1
-        last_row = worksheet.max_row
-        worksheet.conditional_formatting.add(
-            f"A2:{worksheet.cell(row=last_row, column=len(df.columns)).coordinate}",
-            FormulaRule(
-                formula=[f'INDIRECT(ADDRESS(ROW(),{status_col_idx}))="Failed"'],
-                fill=FAILED_FILL,
-            ),
+HEADER_STYLE = "KYO Header"
+BODY_STYLE = "KYO Body"
+STATUS_STYLES = {
+    "Needs Review": ("KYO Needs Review", NEEDS_REVIEW_FILL),
+    "OCR Required": ("KYO OCR Required", OCR_FILL),
+    "Failed": ("KYO Failed", FAILED_FILL),
+}
+
+
+def register_named_styles(workbook):
+    """Adds the header, body and status styles to the workbook so cells can share them by name."""
+    body_alignment = Alignment(wrap_text=True, vertical="top", horizontal="left")
+    styles = [
+        NamedStyle(name=HEADER_STYLE, font=Font(bold=True)),
+        NamedStyle(name=BODY_STYLE, alignment=body_alignment),
+    ]
+    styles += [
+        NamedStyle(name=name, fill=fill, alignment=body_alignment)
+        for name, fill in STATUS_STYLES.values()
+    ]
+    for style in styles:
+        if style.name not in workbook.named_styles:
+            workbook.add_named_style(style)
+
+
+def sanitize_column(series: pd.Series) -> pd.Series:
+    """Column-wise sanitize_for_excel: one regex pass and one slice over the string values."""
+    if series.dtype != object and not pd.api.types.is_string_dtype(series.dtype):
+        return series
+    try:
+        cleaned = series.str.replace(ILLEGAL_CHARACTERS_RE, "", regex=True).str.slice(
+            0, MAX_EXCEL_CELL_LENGTH
         )
-
-
-class ExcelWriter:
-    """Write Excel files with status-based color coding."""
-
-    def __init__(self, path: str, headers: list[str]):
+    except AttributeError:  # an object column holding no strings at all
+        return series
+    # Non-string values come back as NaN from .str; keep the originals for those.
+    return cleaned.where(cleaned.notna(), series)
+
+
+def row_style_names(df: pd.DataFrame) -> pd.Series:
+    """Maps each row's processing_status to the named style used to colour it."""
+    if "processing_status" not in df.columns:
+        return pd.Series(BODY_STYLE, index=df.index)
+    names = {status: name for status, (name, _) in STATUS_STYLES.items()}
+    return df["processing_status"].map(names).fillna(BODY_STYLE)
+
+
+class _StyledSheet:
+    """Appends rows of value cells in a named style to a write-only worksheet, colouring status rows."""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.row_index = 0
+        self._row_fills = dict(STATUS_STYLES.values())
+
+    def append(self, values, style_name: str) -> None:
+        self.row_index += 1
+        row_fill = self._row_fills.get(style_name)
+        if row_fill is not None:
+            # The row fill colours the empty cells without writing them. Write-only sheets
+            # read a row's dimensions when it is appended (see requirements.txt).
+            self.worksheet.row_dimensions[self.row_index].fill = row_fill
+        cells = []
+        for value in values:
+            if value is None:
+                cells.append(None)
+                continue
+            try:
+                cell = WriteOnlyCell(self.worksheet, value=value)
+            except ValueError:  # lists, dicts and the like: written as text, as pandas does
+                cell = WriteOnlyCell(self.worksheet, value=str(value))
+            cell.style = style_name
+            cells.append(cell)
+        self.worksheet.append(cells)
+        if row_fill is not None:
+            # Already written; dropping it keeps memory flat on long sheets.
+            self.worksheet.row_dimensions.pop(self.row_index, None)
+
+
+class ExcelWriter:
+    """Stream rows into a write-only workbook with status-based color coding."""
+
+    def __init__(self, path: str, headers: list[str], width_sample_rows: int = 0):
         self.path = path
         self.headers = headers
-        self.rows: list[dict] = []
+        self.rows_added = 0
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._worksheet = self._workbook.create_sheet(SHEET_NAME)
+        register_named_styles(self._workbook)
+        self._sheet = None
+        self._pending: list[tuple] = []
+        self._widths = ColumnWidthTracker(
+            70,
+            sample_rows=width_sample_rows
+            or EXCEL_WIDTH_SAMPLE_ROWS
+            or STREAMING_WIDTH_SAMPLE_ROWS,
+        )
+        self._widths.add_header(headers)
 
     def add_row(self, data: dict) -> None:
-        self.rows.append(data)
+        values = [_cell_value(data.get(header)) for header in self.headers]
+        style = STATUS_STYLES.get(data.get("processing_status"), (BODY_STYLE, None))[0]
+        self.rows_added += 1
+        if self._sheet is not None:
+            self._sheet.append(values, style)
+            return
+        self._pending.append((values, style))
+        self._widths.add_row(values)
+        if self._widths.sampling_done:
+            self._start_streaming()
+
+    def _start_streaming(self) -> None:
+        self._widths.apply(self._worksheet)
+        self._sheet = _StyledSheet(self._worksheet)
+        self._sheet.append(self.headers, HEADER_STYLE)
+        for values, style in self._pending:
+            self._sheet.append(values, style)
+        self._pending = []
 
     def save(self) -> None:
-        df = pd.DataFrame(self.rows, columns=self.headers)
-        with pd.ExcelWriter(self.path, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="ServiceNow Import")
-            apply_excel_styles(writer.sheets["ServiceNow Import"], df)
+        if self._sheet is None:
+            self._start_streaming()
+        self._workbook.save(self.path)
+
+
+def _cell_value(value):
+    if isinstance(value, float) and value != value:  # NaN, left empty as pandas would
+        return None
+    return sanitize_for_excel(value)
+
+
+def write_import_sheet(output_path, df: pd.DataFrame, row_styles: pd.Series) -> None:
+    """Streams `df` into a write-only workbook, styling each row by `row_styles`."""
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(SHEET_NAME)
+    register_named_styles(workbook)
+    headers = list(df.columns)
+
+    # Write-only sheets need their widths before the first row, so they come from
+    # vectorized column maxima rather than from the rows as they are written.
+    widths = ColumnWidthTracker(70)
+    widths.add_header(headers)
+    sample = df.head(EXCEL_WIDTH_SAMPLE_ROWS) if EXCEL_WIDTH_SAMPLE_ROWS else df
+    for index, column in enumerate(headers):
+        values = sample[column].dropna()
+        if len(values):
+            widths.add_length(index, int(values.astype(str).str.len().max()))
+    widths.apply(worksheet)
+
+    sheet = _StyledSheet(worksheet)
+    sheet.append(headers, HEADER_STYLE)
+    values = df.astype(object).where(df.notna(), None)
+    for row, style_name in zip(values.itertuples(index=False, name=None), row_styles):
+        sheet.append(row, style_name)
+    workbook.save(output_path)
 
 
 def generate_excel(all_results, output_path, template_path):
@@ -146,28 +242,16 @@ def generate_excel(all_results, output_path, template_path):
             raise ExcelGenerationError("No data to generate.")
 
         df = pd.DataFrame(all_results)
-        df_sanitized = df.map(sanitize_for_excel)
         headers = DEFAULT_TEMPLATE_HEADERS
-
-        final_df = pd.DataFrame(columns=headers)
-        for col in headers:
-            if col in df_sanitized.columns:
-                final_df[col] = df_sanitized[col]
-
         internal_cols = ["needs_review", "processing_status"]
-        df_to_save = final_df.drop(
-            columns=[c for c in internal_cols if c in final_df.columns], errors="ignore"
-        )
+        df_to_save = df.reindex(columns=[h for h in headers if h not in internal_cols])
+        df_to_save = df_to_save.apply(sanitize_column)
 
-        with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-            df_to_save.to_excel(writer, index=False, sheet_name="ServiceNow Import")
-            apply_excel_styles(writer.sheets["ServiceNow Import"], df_sanitized)
+        log_info(logger, "Applying formatting and conditional coloring...")
+        write_import_sheet(output_path, df_to_save, row_style_names(df))
 
         log_info(logger, f"Successfully created formatted Excel file: {output_path}")
         return str(output_path)
     except Exception as e:  # pragma: no cover - log and raise
         log_error(logger, f"Excel generation failed: {e}")
         raise ExcelGenerationError(f"Failed to generate Excel file: {e}")
-
-
-
@@ -0,0 +1,344 @@
+# excel_updater.py
+import os
+import time
+from collections import deque
+from copy import copy
+from pathlib import Path
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+
+from config import DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME, STATUS_COLUMN_NAME, EXCEL_WIDTH_SAMPLE_ROWS, EXCEL_STREAMING_WRITE_ROWS
+from excel_utils import ColumnWidthTracker
+from perf_report import StageTimer
+
+class StemMatcher:
+    """
+    Finds which result file a spreadsheet row refers to by locating PDF stems inside the
+    row's description text.
+
+    The stems are compiled once into an Aho–Corasick automaton, so each description is
+    scanned in a single pass regardless of how many files were processed. Matching is
+    case-sensitive, exactly like the `stem in description` test it replaces. A match that
+    lies entirely inside a longer match (e.g. "QA_1" inside "QA_10") is discarded; if more
+    than one distinct stem is still left, the row is ambiguous and `match` reports every
+    candidate instead of silently taking the first.
+    """
+
+    def __init__(self, filenames):
+        self.filenames = {}
+        for filename in filenames:
+            stem = Path(filename).stem
+            if stem:
+                self.filenames.setdefault(stem, filename)
+        self.stems = list(self.filenames)
+        self._goto = [{}]
+        self._output = [()]
+        self._build()
+
+    def _build(self):
+        goto, output = self._goto, self._output
+        for index, stem in enumerate(self.stems):
+            node = 0
+            for char in stem:
+                nxt = goto[node].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][char] = nxt
+                    goto.append({})
+                    output.append(())
+                node = nxt
+            output[node] = (index,)
+
+        # Breadth-first failure links; each node's output also carries the outputs of its
+        # failure chain so matching never has to walk it.
+        self._fail = fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fallback = goto[f].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                if output[fail[child]]:
+                    output[child] = output[child] + output[fail[child]]
+
+    def find_all(self, text: str) -> list:
+        """Returns every (start, end, stem) occurrence in `text`, overlapping ones included."""
+        goto, fail, output, stems = self._goto, self._fail, self._output, self.stems
+        hits = []
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in output[node]:
+                stem = stems[index]
+                hits.append((pos + 1 - len(stem), pos + 1, stem))
+        return hits
+
+    def match(self, text: str) -> list:
+        """
+        Returns the filenames `text` refers to: an empty list for no match, one filename for
+        a clean match, or several for an ambiguous row.
+        """
+        if not text or not self.stems:
+            return []
+        hits = self.find_all(text)
+        if len(hits) > 1:
+            hits = [h for h in hits if not any(o is not h and o[0] <= h[0] and h[1] <= o[1] and o[2] != h[2] for o in hits)]
+        stems = list(dict.fromkeys(stem for _, _, stem in hits))
+        return [self.filenames[stem] for stem in stems]
+
+# --- WORKBOOK UPDATE ---
+
+STATUS_FILLS = {
+    "Pass": PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+    "Fail": PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
+    "Needs Review": PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),
+    "OCR": PatternFill(start_color="0A9BCD", end_color="0A9BCD", fill_type="solid"),
+}
+MAX_COLUMN_WIDTH = 60
+
+def format_status(data: dict) -> str:
+    return f"{data['status']}{' (OCR)' if data['ocr_used'] else ''}"
+
+class UpdatePlan:
+    """Everything the write phase needs, gathered by one read-only pass over the sheet."""
+
+    def __init__(self, sheet_title, headers, columns):
+        self.sheet_title = sheet_title
+        self.headers = headers
+        self.columns = columns
+        self.changes = {}
+        self.ambiguous = []
+        self.widths = ColumnWidthTracker(MAX_COLUMN_WIDTH, sample_rows=EXCEL_WIDTH_SAMPLE_ROWS)
+        self.row_count = 0
+        self.streamed = False
+        # Seconds per update phase: load and match (scan), then write, style and save.
+        self.timings = StageTimer()
+
+def is_blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def _read_headers(rows):
+    """Consumes the header row; returns (headers with the status column ensured, column indexes)."""
+    headers = list(next(rows, ()))
+    if STATUS_COLUMN_NAME not in headers:
+        headers.append(STATUS_COLUMN_NAME)
+    missing = [h for h in (DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME) if h not in headers]
+    if missing:
+        raise ValueError(f"Excel sheet is missing required column(s): {', '.join(missing)}")
+    columns = {h: headers.index(h) for h in (DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME, STATUS_COLUMN_NAME)}
+    return headers, columns
+
+def select_files_for_blank_rows(path, files) -> tuple:
+    """
+    Pre-scan for fill-blanks-only runs: streams the sheet and keeps the files whose stem
+    appears in the description of at least one row with an empty Meta cell. Returns
+    (selected files in input order, number of rows with blank Meta).
+    """
+    matcher = StemMatcher(Path(f).name for f in files)
+    wanted = set()
+    blank_rows = 0
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        _, columns = _read_headers(rows)
+        desc_col, meta_col = columns[DESCRIPTION_COLUMN_NAME], columns[META_COLUMN_NAME]
+        for row in rows:
+            if not is_blank(row[meta_col] if meta_col < len(row) else None):
+                continue
+            blank_rows += 1
+            # Ambiguous rows count too: every file they name must have a result for the
+            # update step to recognise the ambiguity.
+            wanted.update(matcher.match(str(row[desc_col] if desc_col < len(row) else None)))
+    finally:
+        workbook.close()
+    return [f for f in files if Path(f).name in wanted], blank_rows
+
+def scan_workbook(path, results: dict, fill_blanks_only=False) -> UpdatePlan:
+    """
+    Phase one: streams the active sheet in read-only mode and works out which rows change.
+    Only the new (Meta, Author, Status) values of matched rows are kept in memory, plus the
+    column widths, which are tracked here as the final values go by. With
+    `fill_blanks_only`, rows whose Meta cell already holds a value are left alone.
+    """
+    started = time.perf_counter()
+    match_seconds = 0.0
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        headers, columns = _read_headers(rows)
+        plan = UpdatePlan(sheet.title, headers, columns)
+        widths = plan.widths
+        widths.add_header(headers)
+
+        matcher = StemMatcher(results)
+        desc_col, meta_col = columns[DESCRIPTION_COLUMN_NAME], columns[META_COLUMN_NAME]
+        for row_number, row in enumerate(rows, start=2):
+            plan.row_count += 1
+            if fill_blanks_only and not is_blank(row[meta_col] if meta_col < len(row) else None):
+                widths.add_row(row)
+                continue
+            desc = str(row[desc_col] if desc_col < len(row) else None)
+            match_started = time.perf_counter()
+            matches = matcher.match(desc)
+            match_seconds += time.perf_counter() - match_started
+            if len(matches) > 1:
+                plan.ambiguous.append((row_number, matches))
+            elif matches:
+                data = results[matches[0]]
+                new_values = {
+                    columns[META_COLUMN_NAME]: data["models"],
+                    columns[AUTHOR_COLUMN_NAME]: data["author"],
+                    columns[STATUS_COLUMN_NAME]: format_status(data),
+                }
+                plan.changes[row_number] = new_values
+                if not widths.sampling_done:
+                    row = list(row) + [None] * (len(headers) - len(row))
+                    for i, value in new_values.items():
+                        row[i] = value
+            widths.add_row(row)
+        plan.timings.add("match", match_seconds)
+        plan.timings.add("load", time.perf_counter() - started - match_seconds)
+        return plan
+    finally:
+        workbook.close()
+
+def write_workbook(source, destination, plan: UpdatePlan, streaming=False) -> None:
+    """
+    Phase two: sets the planned cells and colours rows by status through conditional
+    formatting. By default the workbook is loaded normally and only the planned cells
+    change, so formatting, filters, validation and other sheets are kept. With
+    `streaming`, it is rewritten through a write-only workbook instead: lighter on very
+    large exports, but only values, header styles and the active sheet's column widths
+    survive. `destination` may be `source`; the new file is written beside it and
+    swapped in once complete.
+    """
+    destination = Path(destination)
+    tmp_path = destination.with_name(destination.stem + ".tmp" + destination.suffix)
+    if streaming:
+        _stream_workbook(source, tmp_path, plan)
+    else:
+        _patch_workbook(source, tmp_path, plan)
+    with plan.timings.stage("save"):
+        os.replace(tmp_path, destination)
+
+def _patch_workbook(source, tmp_path, plan: UpdatePlan) -> None:
+    timings = plan.timings
+    with timings.stage("write"):
+        workbook = openpyxl.load_workbook(source)
+        sheet = workbook[plan.sheet_title]
+        status_col = plan.columns[STATUS_COLUMN_NAME]
+        status_header = sheet.cell(row=1, column=status_col + 1)
+        if status_header.value != STATUS_COLUMN_NAME:
+            status_header.value = STATUS_COLUMN_NAME
+            neighbour = sheet.cell(row=1, column=status_col)
+            if status_col and neighbour.has_style:
+                status_header.font = copy(neighbour.font)
+                status_header.fill = copy(neighbour.fill)
+                status_header.alignment = copy(neighbour.alignment)
+        for row_number, new_values in plan.changes.items():
+            for i, value in new_values.items():
+                sheet.cell(row=row_number, column=i + 1).value = value
+    with timings.stage("style"):
+        plan.widths.apply(sheet)
+        if plan.row_count:
+            add_status_formatting(sheet, status_col, len(plan.headers), plan.row_count + 1)
+    with timings.stage("save"):
+        workbook.save(tmp_path)
+
+def _stream_workbook(source, tmp_path, plan: UpdatePlan) -> None:
+    timings = plan.timings
+    write_started = time.perf_counter()
+    style_before = timings.seconds.get("style", 0.0)
+    reader = openpyxl.load_workbook(source, read_only=True)
+    try:
+        writer = openpyxl.Workbook(write_only=True)
+        active_title = reader.active.title
+        for sheet in reader.worksheets:
+            out = writer.create_sheet(sheet.title)
+            if sheet.title == active_title:
+                _write_active_sheet(sheet, out, plan)
+            else:
+                for row in sheet.iter_rows(values_only=True):
+                    out.append(row)
+        writer.active = reader.sheetnames.index(active_title)
+        timings.add("write", time.perf_counter() - write_started - (timings.seconds.get("style", 0.0) - style_before))
+        with timings.stage("save"):
+            writer.save(tmp_path)
+    finally:
+        reader.close()
+
+def _write_active_sheet(sheet, out, plan: UpdatePlan) -> None:
+    width = len(plan.headers)
+    with plan.timings.stage("style"):
+        plan.widths.apply(out)
+        header_cells = next(sheet.iter_rows(max_row=1), ())
+        header = []
+        for i, value in enumerate(plan.headers):
+            cell = WriteOnlyCell(out, value=value)
+            # Blank header cells and columns past the header come back as EmptyCell, which has no style.
+            if i < len(header_cells) and getattr(header_cells[i], "has_style", False):
+                cell.font = copy(header_cells[i].font)
+                cell.fill = copy(header_cells[i].fill)
+                cell.alignment = copy(header_cells[i].alignment)
+            header.append(cell)
+    out.append(header)
+
+    status_col = plan.columns[STATUS_COLUMN_NAME]
+    for row_number, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+        new_values = plan.changes.get(row_number)
+        if new_values:
+            row = list(row) + [None] * (width - len(row))
+            for i, value in new_values.items():
+                row[i] = value
+        out.append(row)
+
+    if plan.row_count:
+        with plan.timings.stage("style"):
+            add_status_formatting(out, status_col, width, plan.row_count + 1)
+
+def add_status_formatting(worksheet, status_col: int, column_count: int, last_row: int) -> None:
+    """
+    Colours rows by their Processing Status with sheet-level conditional formatting: one rule
+    per status over the whole data range instead of a fill stored on every cell. The status
+    cell of an OCR'd file gets the OCR colour, which takes priority over the row colour.
+    Rules left by an earlier run on the same sheet are replaced rather than duplicated.
+    """
+    kept = ConditionalFormattingList()
+    for formatting in worksheet.conditional_formatting:
+        for rule in formatting.rules:
+            if not any('(OCR)"' in formula for formula in rule.formula or ()):
+                kept.add(formatting, rule)
+    worksheet.conditional_formatting = kept
+    status_letter = get_column_letter(status_col + 1)
+    status_ref = f"${status_letter}2"
+    worksheet.conditional_formatting.add(
+        f"{status_letter}2:{status_letter}{last_row}",
+        FormulaRule(formula=[f'ISNUMBER(FIND("(OCR)",{status_ref}))'], fill=STATUS_FILLS["OCR"]),
+    )
+    data_range = f"A2:{get_column_letter(column_count)}{last_row}"
+    for status in ("Pass", "Fail", "Needs Review"):
+        worksheet.conditional_formatting.add(
+            data_range,
+            FormulaRule(formula=[f'TRIM(SUBSTITUTE({status_ref}," (OCR)",""))="{status}"'], fill=STATUS_FILLS[status]),
+        )
+
+def update_workbook(source, destination, results: dict, fill_blanks_only=False, streaming=None) -> UpdatePlan:
+    """Writes `results` into the matching rows of `source`, saving the updated copy to `destination`."""
+    plan = scan_workbook(source, results, fill_blanks_only)
+    if streaming is None:
+        streaming = bool(EXCEL_STREAMING_WRITE_ROWS) and plan.row_count >= EXCEL_STREAMING_WRITE_ROWS
+    plan.streamed = streaming
+    write_workbook(source, destination, plan, streaming)
+    return plan
@@ -0,0 +1,58 @@
+# excel_utils.py
+from openpyxl.utils import get_column_letter
+
+class ColumnWidthTracker:
+    """
+    Running column widths, fed row by row as cells are written instead of rescanning the
+    finished sheet. A column stops converting values to text once it reaches the cap, and
+    with `sample_rows` set the tracker ignores everything after the first N data rows.
+    """
+
+    def __init__(self, max_width, padding=2, sample_rows=0):
+        self.max_width = max_width
+        self.padding = padding
+        self.sample_rows = sample_rows
+        self.rows_seen = 0
+        self._limit = max_width - padding
+        self._lengths = {}
+
+    @property
+    def sampling_done(self) -> bool:
+        return bool(self.sample_rows) and self.rows_seen >= self.sample_rows
+
+    def add_header(self, values) -> None:
+        """Counts header cells towards the widths without using up the row sample."""
+        self._add(values)
+
+    def add_row(self, values) -> None:
+        if self.sampling_done:
+            return
+        self.rows_seen += 1
+        self._add(values)
+
+    def add_length(self, index: int, length: int) -> None:
+        """Records a precomputed text length for the 0-based column `index`, e.g. a column maximum."""
+        if length > self._lengths.get(index, 0):
+            self._lengths[index] = min(length, self._limit)
+
+    def _add(self, values) -> None:
+        lengths, limit = self._lengths, self._limit
+        for i, value in enumerate(values):
+            if not value:
+                continue
+            current = lengths.get(i, 0)
+            if current >= limit:
+                continue
+            length = len(value) if isinstance(value, str) else len(str(value))
+            if length > current:
+                lengths[i] = length
+
+    def width(self, index: int):
+        """Width for the 0-based column `index`, or None if the column held no values."""
+        length = self._lengths.get(index)
+        return None if length is None else min(length + self.padding, self.max_width)
+
+    def apply(self, worksheet) -> None:
+        """Sets the tracked widths on `worksheet`; for write-only sheets, call before the first row."""
+        for index in sorted(self._lengths):
+            worksheet.column_dimensions[get_column_letter(index + 1)].width = self.width(index)
@@ -1,4 +1,5 @@
 # file_utils.py
+import fnmatch
 import os
 import sys
 import shutil
@@ -21,11 +22,45 @@ def is_file_locked(filepath):
         return True
     return False
 
+def discover_pdfs(root, include=("*.pdf",), exclude=(), min_size=0, max_size=0, recursive=True, on_error=None):
+    """Yields the PDFs under `root` that pass the include/exclude globs and size limits (bytes, 0 = none), directory by directory."""
+    root = Path(root)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Input folder not found: {root}")
+    include = [g.lower() for g in include]
+    exclude = [g.lower() for g in exclude]
+
+    def matches(rel_path, globs):
+        name = rel_path.rsplit("/", 1)[-1]
+        return any(fnmatch.fnmatchcase(name, g) or fnmatch.fnmatchcase(rel_path, g) for g in globs)
+
+    for dirpath, dirnames, filenames in os.walk(root, onerror=on_error):
+        rel_dir = Path(dirpath).relative_to(root)
+        if recursive:
+            dirnames[:] = sorted(d for d in dirnames if not matches((rel_dir / d).as_posix().lower(), exclude))
+        else:
+            dirnames.clear()
+        for name in sorted(filenames):
+            rel_path = (rel_dir / name).as_posix().lower()
+            if not matches(rel_path, include) or matches(rel_path, exclude):
+                continue
+            path = Path(dirpath) / name
+            if min_size or max_size:
+                try:
+                    size = path.stat().st_size
+                except OSError as e:
+                    if on_error:
+                        on_error(e)
+                    continue
+                if size < min_size or (max_size and size > max_size):
+                    continue
+            yield path
+
 # --- UPDATED FUNCTION ---
 def cleanup_temp_files():
-    """Removes temporary files from cache and review folders."""
+    """Removes temporary review files. The extraction cache is size/age bounded and kept between sessions."""
     print("Cleaning up temporary files...")
-    for directory in [CACHE_DIR, PDF_TXT_DIR]:
+    for directory in [PDF_TXT_DIR]:
         if directory.exists():
             for item in directory.iterdir():
                 try:
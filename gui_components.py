@@ -1,7 +1,10 @@
 # gui_components.py
+import time
 import tkinter as tk
 from tkinter import ttk
 
+from file_utils import open_file
+
 def create_main_header(parent, version, colors):
     header = ttk.Frame(parent, style="Header.TFrame", padding=(10, 10))
     header.grid(row=0, column=0, sticky="ew")
@@ -26,6 +29,8 @@ def create_io_section(parent, app):
     app.files_label.grid(row=2, column=1, sticky="e", padx=5, pady=(5,0))
     ttk.Button(io, image=app.browse_icon, text=" Browse Files...", compound="left", command=app.browse_files).grid(row=2, column=2, padx=5, pady=(5,0))
 
+    ttk.Checkbutton(io, text="Only fill blank Meta cells (skip PDFs whose rows are already filled)", variable=app.fill_blanks_only).grid(row=3, column=1, sticky="w", padx=5, pady=(5,0))
+
 def create_process_controls(parent, app):
     ctrl = ttk.LabelFrame(parent, text="2. Process & Manage", padding=10)
     ctrl.grid(row=1, column=0, sticky="ew", pady=5)
@@ -95,10 +100,80 @@ def create_status_and_log_section(parent, app):
 
     log_frame = ttk.Frame(stat)
     log_frame.grid(row=4, column=0, sticky="nsew", padx=5, pady=(10,2))
-    log_frame.rowconfigure(0, weight=1)
-    log_frame.columnconfigure(0, weight=1)
-    app.log_text = tk.Text(log_frame, height=8, wrap=tk.WORD, state=tk.DISABLED, relief="solid", borderwidth=1, font=("Consolas", 9))
-    app.log_text.grid(row=0, column=0, sticky="nsew")
-    log_scroll = ttk.Scrollbar(log_frame, command=app.log_text.yview)
-    log_scroll.grid(row=0, column=1, sticky="ns")
-    app.log_text.config(yscrollcommand=log_scroll.set)
\ No newline at end of file
+    app.log_view = LogView(log_frame, app.log_view_max_lines, app.activity_log_path, app.log_text_tags, app.log_highlight)
+    app.log_text = app.log_view.text
+
+class LogView:
+    """Log panel showing the newest `max_lines` lines, with the full history kept in `history_path`."""
+
+    LEVELS = ("info", "success", "warning", "error")
+
+    def __init__(self, frame, max_lines, history_path, tag_colors, highlight):
+        self.max_lines = max_lines
+        self.history_path = history_path
+        self._history = None
+        frame.rowconfigure(1, weight=1)
+        frame.columnconfigure(0, weight=1)
+
+        bar = ttk.Frame(frame)
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 2))
+        ttk.Label(bar, text="Show:").pack(side="left")
+        self.visible = {}
+        for level in self.LEVELS:
+            var = tk.BooleanVar(value=True)
+            ttk.Checkbutton(bar, text=level.title(), variable=var, command=lambda l=level: self.set_visible(l, self.visible[l].get())).pack(side="left", padx=4)
+            self.visible[level] = var
+        ttk.Button(bar, text="Full Log", command=self.open_history).pack(side="right")
+
+        self.text = tk.Text(frame, height=8, wrap=tk.WORD, state=tk.DISABLED, relief="solid", borderwidth=1, font=("Consolas", 9))
+        self.text.grid(row=1, column=0, sticky="nsew")
+        log_scroll = ttk.Scrollbar(frame, command=self.text.yview)
+        log_scroll.grid(row=1, column=1, sticky="ns")
+        self.text.config(yscrollcommand=log_scroll.set)
+
+        self.text.tag_configure("timestamp", foreground="grey")
+        for tag, (fg, bg) in tag_colors.items():
+            self.text.tag_configure(f"{tag}_fg", foreground=fg)
+            self.text.tag_configure(f"{tag}_line", background=bg, selectbackground=highlight)
+
+    def append(self, entries):
+        """Adds (level, message) lines in one widget update and records them in the history file."""
+        if not entries:
+            return
+        self._write_history(entries)
+        timestamp = time.strftime("%H:%M:%S")
+        chunks = []
+        for level, message in entries[-self.max_lines:]:
+            line_tags = (f"level_{level}",) + ((f"{level}_line",) if level in ["warning", "error", "success"] else ())
+            chunks += [f"[{timestamp}] ", ("timestamp",) + line_tags, f"{message}\n", (f"{level}_fg",) + line_tags]
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, *chunks)
+        excess = int(self.text.index("end-1c").split(".")[0]) - 1 - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        self.text.see(tk.END)
+        self.text.config(state=tk.DISABLED)
+
+    def set_visible(self, level, visible):
+        self.text.tag_configure(f"level_{level}", elide=not visible)
+        self.text.see(tk.END)
+
+    def _write_history(self, entries):
+        try:
+            if self._history is None:
+                self.history_path.parent.mkdir(parents=True, exist_ok=True)
+                self._history = open(self.history_path, "a", encoding="utf-8")
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._history.writelines(f"{stamp} [{level.upper():<8}] {message}\n" for level, message in entries)
+            self._history.flush()
+        except OSError as e:
+            print(f"Could not write log history: {e}")
+
+    def open_history(self):
+        if self._history is not None:
+            open_file(self.history_path)
+
+    def close(self):
+        if self._history is not None:
+            self._history.close()
+            self._history = None
\ No newline at end of file
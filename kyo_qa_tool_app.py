@@ -1,15 +1,17 @@
 # kyo_qa_tool_app.py
+import time
+_STARTUP_T0 = time.perf_counter()
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
 import threading
 import queue
-import time
 import importlib
 import sys
+import multiprocessing
 
-from config import BRAND_COLORS, ASSETS_DIR
-from processing_engine import run_processing_job
+from config import BRAND_COLORS, ASSETS_DIR, FILL_BLANKS_ONLY, LOG_VIEW_MAX_LINES
+from data_harvesters import pattern_registry
 from file_utils import open_file, ensure_folders, cleanup_temp_files
 from kyo_review_tool import ReviewWindow
 from version import VERSION
@@ -19,6 +21,10 @@ from gui_components import (
     create_process_controls, create_status_and_log_section
 )
 
+# The processing engine (PyMuPDF, OpenCV, openpyxl, ...) is imported after the window is up;
+# see _warm_up_engine.
+_IMPORTS_DONE = time.perf_counter()
+
 logger = logging_utils.setup_logger("app")
 
 class KyoQAToolApp(tk.Tk):
@@ -43,6 +49,7 @@ class KyoQAToolApp(tk.Tk):
         self.selected_folder = tk.StringVar()
         self.selected_excel = tk.StringVar()
         self.selected_files_list = []
+        self.fill_blanks_only = tk.BooleanVar(value=FILL_BLANKS_ONLY)
         self.status_current_file = tk.StringVar(value="Ready to process")
         self.progress_value = tk.DoubleVar(value=0)
         self.time_remaining_var = tk.StringVar(value="")
@@ -69,8 +76,33 @@ class KyoQAToolApp(tk.Tk):
         self.attributes("-fullscreen", self.is_fullscreen)
         self.bind_all("<Escape>", self.toggle_fullscreen)
 
+        pattern_registry.add_listener(self._on_patterns_reloaded)
         self.after(100, self.process_response_queue)
         self.set_led("Ready")
+        self.after(1, self._report_startup)
+
+    def _report_startup(self):
+        imports_ms = (_IMPORTS_DONE - _STARTUP_T0) * 1000
+        window_ms = (time.perf_counter() - _STARTUP_T0) * 1000
+        message = f"Startup: window ready in {window_ms:.0f} ms (imports {imports_ms:.0f} ms)."
+        logging_utils.log_info(logger, message)
+        self.log_message(message, "info")
+        threading.Thread(target=self._warm_up_engine, daemon=True).start()
+
+    def _warm_up_engine(self):
+        """Loads the processing engine and probes Tesseract in the background so the first job starts promptly."""
+        start = time.perf_counter()
+        try:
+            import processing_engine
+            from ocr_utils import tesseract_available
+            ocr = "available" if tesseract_available() else "not available"
+        except Exception as e:
+            self.response_queue.put({"type": "log", "tag": "warning", "msg": f"Background engine load failed: {e}"})
+            return
+        message = f"Startup: engine loaded in the background in {(time.perf_counter() - start) * 1000:.0f} ms (OCR {ocr})."
+        logging_utils.log_info(logger, message)
+        # Routed through the response queue; Tk widgets are only touched from the main thread.
+        self.response_queue.put({"type": "log", "tag": "info", "msg": message})
 
     # --- NEW: Helper function to safely load icons ---
     def _load_icon(self, filename):
@@ -125,6 +157,9 @@ class KyoQAToolApp(tk.Tk):
             "info": ("#00529B", "white"), "warning": ("#9F6000", "#FEEFB3"),
             "error": ("#D8000C", "#FFD2D2"), "success": ("#4F8A10", "#DFF2BF")
         }
+        self.log_highlight = BRAND_COLORS["highlight_blue"]
+        self.log_view_max_lines = LOG_VIEW_MAX_LINES
+        self.activity_log_path = logging_utils.ACTIVITY_LOG_FILE
 
         self.style.configure("TButton", font=("Segoe UI", 10), padding=6, relief="raised")
         self.style.map("TButton", background=[('active', '#e0e0e0'), ('!active', '#f0f0f0')], foreground=[('active', 'black'), ('!active', 'black')])
@@ -149,22 +184,12 @@ class KyoQAToolApp(tk.Tk):
         create_io_section(main_frame, self)
         create_process_controls(main_frame, self)
         create_status_and_log_section(main_frame, self)
-        self.log_text.tag_configure("timestamp", foreground="grey")
-        for tag, (fg, bg) in self.log_text_tags.items():
-            self.log_text.tag_configure(f"{tag}_fg", foreground=fg)
-            self.log_text.tag_configure(f"{tag}_line", background=bg, selectbackground=BRAND_COLORS["highlight_blue"])
 
     def log_message(self, message, level="info"):
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.config(state=tk.NORMAL)
-        start_index = self.log_text.index(tk.END)
-        self.log_text.insert(tk.END, f"[{timestamp}] ", "timestamp")
-        self.log_text.insert(tk.END, f"{message}\n", f"{level}_fg")
-        end_index = self.log_text.index(tk.END)
-        if level in ["warning", "error", "success"]:
-             self.log_text.tag_add(f"{level}_line", start_index, end_index)
-        self.log_text.see(tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        self.append_log([(level, message)])
+
+    def append_log(self, entries):
+        self.log_view.append(entries)
 
     def start_processing(self, job=None, is_rerun=False):
         if self.is_processing: return
@@ -177,12 +202,13 @@ class KyoQAToolApp(tk.Tk):
             if not excel_path:
                 messagebox.showwarning("Input Missing", "Please select a base Excel file.")
                 return
-            job = {"excel_path": excel_path, "input_path": input_path}
+            job = {"excel_path": excel_path, "input_path": input_path, "fill_blanks_only": self.fill_blanks_only.get()}
             self.last_run_info = job
         job["is_rerun"] = is_rerun
         self.update_ui_for_start()
         self.log_message("Starting processing job...", "info")
         self.start_time = time.time()
+        from processing_engine import run_processing_job
         threading.Thread(target=run_processing_job, args=(job, self.response_queue, self.cancel_event, self.pause_event), daemon=True).start()
 
     def rerun_flagged_job(self):
@@ -207,9 +233,9 @@ class KyoQAToolApp(tk.Tk):
         if path:
             self.selected_folder.set(path)
             self.selected_files_list = []
-            pdf_count = len(list(Path(path).glob("*.pdf")))
-            self.files_label.config(text=f"{pdf_count} PDFs in folder")
-            self.log_message(f"Folder selected: {path} ({pdf_count} PDFs)", "info")
+            # Subfolders are included and may sit on a slow share, so PDFs are counted as the job discovers them.
+            self.files_label.config(text="Folder selected (subfolders included)")
+            self.log_message(f"Folder selected: {path}", "info")
 
     def browse_files(self):
         paths = filedialog.askopenfilenames(title="Select PDF Files", filetypes=[("PDF Files", "*.pdf"), ("All Files", "*.*")])
@@ -244,10 +270,16 @@ class KyoQAToolApp(tk.Tk):
                 return
 
         print("Closing application...")
+        pattern_registry.remove_listener(self._on_patterns_reloaded)
         self.cancel_event.set()
         cleanup_temp_files()
+        self.log_view.close()
         self.destroy()
 
+    def _on_patterns_reloaded(self, patterns):
+        # Routed through the response queue; listeners may fire outside the Tk thread.
+        self.response_queue.put({"type": "log", "tag": "info", "msg": f"Patterns reloaded (set {patterns.fingerprint}); they apply to the next job."})
+
     def open_result(self):
         if self.result_file_path and Path(self.result_file_path).exists():
             try:
@@ -359,12 +391,33 @@ class KyoQAToolApp(tk.Tk):
                 if remaining > 60: self.time_remaining_var.set(f"~{int(remaining/60)}m {int(remaining%60)}s left")
                 else: self.time_remaining_var.set(f"~{int(remaining)}s left")
 
+    def add_review_item(self, data):
+        self.reviewable_files.append(data)
+        self.review_tree.insert('', 'end', values=(data.get('filename', 'Unknown'),))
+
+    def apply_progress_batch(self, batch):
+        """Applies one coalesced engine update: a single log insert, then the latest status, progress and counter deltas."""
+        self.append_log(batch.get("logs", []))
+        status = batch.get("status")
+        if status:
+            self.status_current_file.set(status.get("msg", ""))
+            if status.get("led"): self.set_led(status["led"])
+        progress = batch.get("progress")
+        if progress: self.update_progress(progress.get("current", 0), progress.get("total", 1))
+        for name, delta in batch.get("counters", {}).items():
+            var = getattr(self, f"count_{name}", None)
+            if var: var.set(var.get() + delta)
+        for data in batch.get("review_items", []):
+            self.add_review_item(data)
+
     def process_response_queue(self):
         try:
             while not self.response_queue.empty():
                 msg = self.response_queue.get_nowait()
                 mtype = msg.get("type")
-                if mtype == "log":
+                if mtype == "batch":
+                    self.apply_progress_batch(msg)
+                elif mtype == "log":
                     self.log_message(msg.get("msg", ""), msg.get("tag", "info"))
                 elif mtype == "status":
                     self.status_current_file.set(msg.get("msg", ""))
@@ -377,9 +430,7 @@ class KyoQAToolApp(tk.Tk):
                     var = getattr(self, f"count_{msg.get('status', '').lower().replace(' ', '_')}", None)
                     if var: var.set(var.get() + 1)
                 elif mtype == "review_item":
-                    data = msg.get("data", {})
-                    self.reviewable_files.append(data)
-                    self.review_tree.insert('', 'end', values=(data.get('filename', 'Unknown'),))
+                    self.add_review_item(msg.get("data", {}))
                 elif mtype == "result_path": self.result_file_path = msg.get("path")
                 elif mtype == "finish":
                     status = msg.get("status", "Complete")
@@ -391,6 +442,7 @@ class KyoQAToolApp(tk.Tk):
         self.after(100, self.process_response_queue)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     try:
         app = KyoQAToolApp()
         app.mainloop()
@@ -3,10 +3,12 @@ import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog
 from pathlib import Path
 import re
+import os
 import importlib
 
 from config import BRAND_COLORS
 import config as config_module 
+from data_harvesters import pattern_registry
 
 #==============================================================
 # --- MODIFICATION: Rewritten to avoid f-string syntax error ---
@@ -41,7 +43,7 @@ class ReviewWindow(tk.Toplevel):
         self.pattern_name = pattern_name
         self.pattern_label = pattern_label
         self.file_info = file_info
-        self.custom_patterns_path = Path("custom_patterns.py")
+        self.custom_patterns_path = pattern_registry.path
         
         self.title(f"Manage Custom: {self.pattern_label}")
         self.geometry("1000x700")
@@ -148,8 +150,12 @@ class ReviewWindow(tk.Toplevel):
                     file_content += f"    r'{safe_pattern}',\n"
                 file_content += "]\n"
             
-            self.custom_patterns_path.write_text(file_content, encoding='utf-8')
-            messagebox.showinfo("Success", "Custom patterns saved successfully!\nChanges will apply on the next run.", parent=self)
+            # Written to a temp file and swapped in, so a job starting mid-save never reads half a file.
+            tmp_path = self.custom_patterns_path.with_suffix(".py.tmp")
+            tmp_path.write_text(file_content, encoding='utf-8')
+            os.replace(tmp_path, self.custom_patterns_path)
+            pattern_registry.reload()
+            messagebox.showinfo("Success", "Custom patterns saved successfully!\nChanges will apply to the next job.", parent=self)
             self.destroy()
         except Exception as e:
             messagebox.showerror("Save Failed", f"Could not save patterns to file:\n{e}", parent=self)
@@ -9,7 +9,10 @@ from logging.handlers import RotatingFileHandler
 LOG_DIR = Path.cwd() / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
-SESSION_LOG_FILE = LOG_DIR / f"{datetime.now():%Y-%m-%d_%H-%M-%S}_session.log"
+SESSION_STAMP = f"{datetime.now():%Y-%m-%d_%H-%M-%S}"
+SESSION_LOG_FILE = LOG_DIR / f"{SESSION_STAMP}_session.log"
+# Every line shown in the GUI log panel, which itself only keeps the newest lines.
+ACTIVITY_LOG_FILE = LOG_DIR / f"{SESSION_STAMP}_activity.log"
 
 
 class QtWidgetHandler(logging.Handler):
@@ -1,19 +1,23 @@
 # ocr_utils.py
-import fitz  # PyMuPDF
+# PyMuPDF (fitz), OpenCV, NumPy and pytesseract are imported inside the functions that use
+# them, so importing this module (and the engine, and the GUI) stays fast; the first
+# extraction pays for them instead. Tesseract is likewise only probed when first needed.
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from config import DEFAULT_OCR_DPI, OCR_MIN_CONFIDENCE
 from logging_utils import setup_logger, log_info, log_error, log_warning
-import pytesseract
-from PIL import Image
-import io
-import cv2  # OpenCV for image processing
-import numpy as np
+from perf_report import StageTimer
 
 logger = setup_logger("ocr_utils")
 
 def init_tesseract():
     """Initialize Tesseract OCR if available."""
     try:
+        import pytesseract
         portable_path = Path(__file__).parent / "tesseract" / "tesseract.exe"
         if portable_path.exists():
             pytesseract.pytesseract.tesseract_cmd = str(portable_path)
@@ -47,81 +51,236 @@ def init_tesseract():
         log_error(logger, f"An unexpected error occurred during Tesseract initialization: {e}")
         return False
 
-TESSERACT_AVAILABLE = init_tesseract()
+_tesseract_available = None
+_tesseract_lock = threading.Lock()
 
-def _is_ocr_needed(pdf_path):
-    """Pre-checks a PDF to see if it's image-based and likely requires OCR."""
+def tesseract_available():
+    """Probes for Tesseract once per process, on first use, and returns the cached answer."""
+    global _tesseract_available
+    with _tesseract_lock:
+        if _tesseract_available is None:
+            _tesseract_available = init_tesseract()
+        return _tesseract_available
+
+def __getattr__(name):
+    # Keeps `from ocr_utils import TESSERACT_AVAILABLE` working without probing at import.
+    if name == "TESSERACT_AVAILABLE":
+        return tesseract_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- PAGE-LEVEL OCR CONCURRENCY ---
+# One pool per process, shared by every document, so the configured size is a hard cap on
+# concurrent Tesseract runs in this process. The engine sizes it from the CPU budget left
+# over after file-level workers (see processing_engine.resolve_page_workers).
+_ocr_page_workers = 1
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+def configure_ocr_concurrency(page_workers):
+    """Sets how many pages may be OCR'd at once in this process. Also used as a pool initializer."""
+    global _ocr_page_workers, _ocr_pool
+    with _ocr_pool_lock:
+        _ocr_page_workers = max(1, int(page_workers))
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False)
+            _ocr_pool = None
+    # Tesseract would otherwise start its own OpenMP threads on top of ours.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+def _get_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=_ocr_page_workers, thread_name_prefix="ocr-page")
+        return _ocr_pool
+
+# Pages whose native text layer is this short or shorter are treated as scans and OCR'd.
+# Mirrors the per-page fallback in pdf_processor.extract_text_with_hybrid_approach.
+MIN_TEXT_LENGTH_PER_PAGE = 50
+
+def extract_pdf_pages(pdf_path, force_ocr=False, on_ocr_start=None, stop_when=None, max_ocr_pages=0, dpi_ladder=None, timer=None):
+    """Opens a PDF once and returns its per-page text, OCRing only the pages with too little native text."""
+    import fitz  # PyMuPDF
+    pdf_path = Path(pdf_path)
+    timer = timer or StageTimer()
+    result = {"page_count": 0, "ocr_used": False, "pages_ocr": 0, "pages_native": 0, "pages_skipped": 0, "pages_ocr_missing": 0, "pages": []}
+    pages = []
     try:
-        with fitz.open(pdf_path) as doc:
-            if not doc.is_pdf or doc.is_encrypted:
-                return False
-            
-            text_length = sum(len(page.get_text("text")) for page in doc)
-            if text_length < 150:
-                return True
-    except Exception as e:
-        log_warning(logger, f"Could not pre-check PDF {Path(pdf_path).name} for OCR needs: {e}")
-        return True
-    return False
+        with timer.stage("open"):
+            doc = fitz.open(pdf_path)
+        with doc:
+            with timer.stage("native_text"):
+                for i, page in enumerate(doc):
+                    text = page.get_text()
+                    pages.append({"page": i + 1, "text": text, "native_chars": len(text.strip()), "source": "native"})
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file, using OCR if needed."""
+            # Thin pages without any image (blank separators, trailing pages) have nothing to OCR.
+            scanned = [p for p in pages if force_ocr or (p["native_chars"] <= MIN_TEXT_LENGTH_PER_PAGE and doc[p["page"] - 1].get_image_info())]
+            should_stop = None
+            if stop_when and scanned:
+                should_stop = lambda: stop_when("\n".join(p["text"] for p in pages))
+                if should_stop():
+                    scanned = _mark_skipped(scanned)
+                elif max_ocr_pages and len(scanned) > max_ocr_pages:
+                    _mark_skipped(scanned[max_ocr_pages:])
+                    scanned = scanned[:max_ocr_pages]
+            if scanned and not tesseract_available():
+                log_warning(logger, f"{len(scanned)} page(s) of {pdf_path.name} have no text layer and OCR is not available.")
+                for record in scanned:
+                    record["source"] = "ocr_missing"
+            elif scanned:
+                log_info(logger, f"Attempting OCR on {len(scanned)} of {len(pages)} page(s) of {pdf_path.name}")
+                if on_ocr_start:
+                    on_ocr_start()
+                result["ocr_used"] = True
+                _ocr_pages(doc, scanned, pdf_path.name, should_stop, dpi_ladder, timer=timer)
+    except Exception as exc:
+        log_error(logger, f"Failed to extract text from {pdf_path.name}: {exc}")
+    # Whatever was read before a failure is kept, so one bad page never costs the native text.
+    result["page_count"] = len(pages)
+    result["pages_ocr"] = sum(1 for p in pages if p["source"] == "ocr")
+    result["pages_skipped"] = sum(1 for p in pages if p["source"] == "skipped")
+    # Pages that needed OCR but did not get it; the extraction is incomplete and must not be cached.
+    result["pages_ocr_missing"] = sum(1 for p in pages if p["source"] == "ocr_missing")
+    result["pages_native"] = len(pages) - result["pages_ocr"] - result["pages_skipped"] - result["pages_ocr_missing"]
+    log_info(logger, f"Extracted {pdf_path.name}: {result['pages_native']} native page(s), {result['pages_ocr']} OCR page(s), {result['pages_skipped']} skipped, {result['pages_ocr_missing']} not OCR'd")
+    result["pages"] = pages
+    return result
+
+def join_page_texts(extraction):
+    """Joins the per-page text of an `extract_pdf_pages` result into one string."""
+    return "\n".join(p["text"] for p in extraction["pages"])
+
+def refine_ocr_pages(pdf_path, extraction, dpi=DEFAULT_OCR_DPI, timer=None):
+    """Re-OCRs the pages of an extraction that were read below `dpi`; returns how many were redone."""
+    pdf_path = Path(pdf_path)
+    records = [p for p in extraction["pages"] if p["source"] == "ocr" and p.get("dpi", dpi) < dpi]
+    if not records or not tesseract_available():
+        return 0
+    import fitz  # PyMuPDF
     try:
-        pdf_path = Path(pdf_path)
-        text = ""
         with fitz.open(pdf_path) as doc:
-            text = "".join(page.get_text() for page in doc)
-            
-        if text and len(text.strip()) > 50:
-            log_info(logger, f"Extracted text directly from {pdf_path.name}")
-            return text
-            
-        if TESSERACT_AVAILABLE:
-            log_info(logger, f"Attempting OCR on {pdf_path.name}")
-            return extract_text_with_ocr(pdf_path)
-        else:
-            log_warning(logger, f"No text found in {pdf_path.name} and OCR is not available.")
-            return ""
+            _ocr_pages(doc, records, pdf_path.name, dpi_ladder=(dpi,), with_confidence=True, timer=timer)
     except Exception as exc:
-        log_error(logger, f"Failed to extract text from {pdf_path.name}: {exc}")
-        return ""
+        log_error(logger, f"Failed to re-OCR {pdf_path.name} at {dpi} DPI: {exc}")
+        return 0
+    log_info(logger, f"Re-OCR'd {len(records)} page(s) of {pdf_path.name} at {dpi} DPI")
+    return len(records)
+
+def extract_text_from_pdf(pdf_path):
+    """Extract text from a PDF file, using OCR if needed."""
+    return join_page_texts(extract_pdf_pages(pdf_path))
 
-# --- UPDATED OCR FUNCTION ---
 def extract_text_with_ocr(pdf_path):
     """Extract text from a PDF using pre-processing and OCR."""
-    if not TESSERACT_AVAILABLE:
+    if not tesseract_available():
         log_warning(logger, "Tesseract OCR not available, cannot perform OCR.")
         return ""
-        
-    all_text = []
-    try:
-        with fitz.open(pdf_path) as doc:
-            for page_num, page in enumerate(doc):
-                # 1. Render page at a higher DPI for better quality
-                pix = page.get_pixmap(dpi=300)
-                img_data = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
-                
-                # 2. Convert to OpenCV format (from RGB to BGR)
-                img_cv = cv2.cvtColor(img_data, cv2.COLOR_RGB2BGR)
-
-                # 3. Pre-process the image for better OCR accuracy
-                # Convert to grayscale
-                gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-                # Apply adaptive thresholding to get a clean black and white image
-                binary_img = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-
-                # 4. Use Tesseract to do OCR on the processed image
-                # lang='eng' for English. Add other languages like 'jpn' if needed (e.g., 'eng+jpn')
-                # --psm 6 assumes a single uniform block of text, often good for technical docs.
-                custom_config = r'--oem 3 --psm 6'
-                page_text = pytesseract.image_to_string(binary_img, lang='eng', config=custom_config)
-                
-                all_text.append(page_text)
-                log_info(logger, f"OCR processed page {page_num+1} of {pdf_path.name}")
-                
-        result = "\n\n".join(all_text)
-        log_info(logger, f"OCR extraction complete for {pdf_path.name}: {len(result)} chars")
-        return result
-    except Exception as e:
-        log_error(logger, f"OCR extraction failed for {pdf_path.name}: {e}")
-        return ""
\ No newline at end of file
+    return join_page_texts(extract_pdf_pages(pdf_path, force_ocr=True))
+
+def _mark_skipped(records):
+    for record in records:
+        record["source"] = "skipped"
+    return []
+
+def _ocr_pages(doc, records, name, should_stop=None, dpi_ladder=None, with_confidence=None, timer=None):
+    """OCRs `records` in place; pages are rendered here (PyMuPDF is not thread-safe) and recognized on the pool."""
+    timer = timer or StageTimer()
+    ladder = tuple(dpi_ladder) if dpi_ladder else (DEFAULT_OCR_DPI,)
+    if with_confidence is None:
+        with_confidence = len(ladder) > 1
+    pool = _get_ocr_pool()
+    in_flight = deque()
+    stopped = False
+
+    def submit(record, step):
+        try:
+            with timer.stage("ocr_render"):
+                image = _render_page(doc[record["page"] - 1], ladder[step])
+        except Exception as exc:
+            future = Future()
+            future.set_exception(exc)
+            return (record, step, future)
+        return (record, step, pool.submit(_timed_recognize, image, with_confidence))
+
+    def collect():
+        best = None
+        while True:
+            record, step, future = in_flight.popleft()
+            try:
+                text, confidence, seconds = future.result()
+            except Exception as exc:
+                # The page keeps its native text (or a lower-DPI reading) rather than failing the document.
+                log_warning(logger, f"OCR failed on page {record['page']} of {name} at {ladder[step]} DPI: {exc}")
+                break
+            timer.add("ocr_recognize", seconds)
+            best = (text, confidence, step)
+            if confidence is not None and confidence < OCR_MIN_CONFIDENCE and step + 1 < len(ladder):
+                log_info(logger, f"Page {record['page']} of {name}: confidence {confidence:.0f} at {ladder[step]} DPI, retrying at {ladder[step + 1]} DPI")
+                in_flight.appendleft(submit(record, step + 1))
+                continue
+            break
+        if best:
+            text, confidence, step = best
+            record.update(text=text, source="ocr", dpi=ladder[step], confidence=confidence)
+            log_info(logger, f"OCR processed page {record['page']} of {name}")
+        elif record["source"] == "native":
+            record["source"] = "ocr_missing"
+        return bool(should_stop and should_stop())
+
+    for i, record in enumerate(records):
+        if stopped:
+            _mark_skipped(records[i:])
+            log_info(logger, f"Harvest complete for {name}; skipping OCR of {len(records) - i} page(s)")
+            break
+        in_flight.append(submit(record, 0))
+        if len(in_flight) >= _ocr_page_workers:
+            stopped = collect()
+    while in_flight:
+        collect()
+
+def _render_page(page, dpi=DEFAULT_OCR_DPI):
+    import numpy as np
+    # 1. Render the page; adaptive mode starts low and only escalates when confidence is poor
+    pix = page.get_pixmap(dpi=dpi)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+
+def _timed_recognize(img_data, with_confidence=False):
+    started = time.perf_counter()
+    text, confidence = _recognize_image(img_data, with_confidence)
+    return text, confidence, time.perf_counter() - started
+
+# --- UPDATED OCR FUNCTION ---
+def _recognize_image(img_data, with_confidence=False):
+    """Returns (text, mean word confidence). Confidence is None unless requested."""
+    import cv2  # OpenCV for image processing
+    import pytesseract
+    # 2. Convert to OpenCV format (from RGB to BGR)
+    img_cv = cv2.cvtColor(img_data, cv2.COLOR_RGB2BGR)
+
+    # 3. Pre-process the image for better OCR accuracy
+    # Convert to grayscale
+    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    # Apply adaptive thresholding to get a clean black and white image
+    binary_img = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+    # 4. Use Tesseract to do OCR on the processed image
+    # lang='eng' for English. Add other languages like 'jpn' if needed (e.g., 'eng+jpn')
+    # --psm 6 assumes a single uniform block of text, often good for technical docs.
+    custom_config = r'--oem 3 --psm 6'
+    if not with_confidence:
+        return pytesseract.image_to_string(binary_img, lang='eng', config=custom_config), None
+
+    # image_to_data gives per-word confidences; rebuild the text line by line in reading order.
+    data = pytesseract.image_to_data(binary_img, lang='eng', config=custom_config, output_type=pytesseract.Output.DICT)
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), []).append(word)
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            confidences.append(conf)
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, (sum(confidences) / len(confidences) if confidences else 0.0)
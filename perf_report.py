@@ -0,0 +1,128 @@
+# perf_report.py
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Per-file stages, in pipeline order. OCR stages add up page times, so with several OCR page
+# threads they can exceed the file's wall time.
+FILE_STAGES = ("open", "native_text", "ocr_render", "ocr_recognize", "harvest", "cache_io")
+EXCEL_PHASES = ("load", "match", "write", "style", "save")
+PERCENTILES = (50, 90, 95, 99)
+
+class StageTimer:
+    """Accumulates wall time per named stage; a stage may be entered many times (e.g. once per page)."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+def percentile(sorted_values, q):
+    """Linearly interpolated percentile `q` (0-100) of an already sorted, non-empty list."""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class PerformanceReport:
+    """
+    Aggregates one job's timings: the per-stage seconds of every processed file (as returned
+    in each result's "timings") and the Excel update phases. `summary` reduces the file
+    timings to per-stage percentiles; `write` saves it as JSON and Markdown.
+    """
+
+    def __init__(self, started=None):
+        self.started = started or datetime.now()
+        self.files = []
+        self.excel = {}
+        self.wall_seconds = 0.0
+        self.info = {}
+
+    def add_file(self, filename, timings, cache_hit=None):
+        self.files.append({"filename": filename, "cache_hit": cache_hit, "timings": dict(timings or {})})
+
+    def summary(self, slowest=10) -> dict:
+        stages = {}
+        names = list(FILE_STAGES) + sorted({s for f in self.files for s in f["timings"]} - set(FILE_STAGES))
+        for name in names:
+            values = sorted(f["timings"][name] for f in self.files if name in f["timings"])
+            if not values:
+                continue
+            stats = {"files": len(values), "total_s": round(sum(values), 3), "mean_ms": round(sum(values) / len(values) * 1000, 2)}
+            for q in PERCENTILES:
+                stats[f"p{q}_ms"] = round(percentile(values, q) * 1000, 2)
+            stats["max_ms"] = round(values[-1] * 1000, 2)
+            stages[name] = stats
+        totals = sorted(self.files, key=lambda f: sum(f["timings"].values()), reverse=True)[:slowest]
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": round(self.wall_seconds, 3),
+            **self.info,
+            "files": len(self.files),
+            "stages": stages,
+            "excel_s": {phase: round(self.excel[phase], 3) for phase in list(EXCEL_PHASES) + sorted(set(self.excel) - set(EXCEL_PHASES)) if phase in self.excel},
+            "slowest_files": [
+                {"filename": f["filename"], "cache_hit": f["cache_hit"], "total_ms": round(sum(f["timings"].values()) * 1000, 2),
+                 "stages_ms": {k: round(v * 1000, 2) for k, v in f["timings"].items()}}
+                for f in totals
+            ],
+        }
+
+    def write(self, directory, stem=None) -> tuple:
+        """Writes `<stem>.json` and `<stem>.md` to `directory`; returns both paths."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = stem or f"{self.started:%Y-%m-%d_%H%M%S}_performance"
+        summary = self.summary()
+        json_path = directory / f"{stem}.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        md_path = directory / f"{stem}.md"
+        with open(md_path, "w", encoding="utf-8") as f:
+            f.write(render_markdown(summary))
+        return json_path, md_path
+
+def render_markdown(summary) -> str:
+    lines = [
+        "# KYO QA Tool Performance Report",
+        "",
+        f"**Started:** {summary['started']}  ",
+        f"**Wall time:** {summary['wall_s']:.1f} s  ",
+        f"**Files processed:** {summary['files']}",
+    ]
+    for key in ("workers", "page_workers", "cache_harvest_hits", "cache_text_hits", "cache_misses"):
+        if key in summary:
+            lines[-1] += "  "
+            lines.append(f"**{key.replace('_', ' ').capitalize()}:** {summary[key]}")
+    lines += ["", "## File stages", ""]
+    if summary["stages"]:
+        header = ["Stage", "Files", "Total s", "Mean ms"] + [f"p{q} ms" for q in PERCENTILES] + ["Max ms"]
+        lines += ["| " + " | ".join(header) + " |", "|" + " --- |" * len(header)]
+        for name, s in summary["stages"].items():
+            row = [name, s["files"], f"{s['total_s']:.2f}", f"{s['mean_ms']:.1f}"] + [f"{s[f'p{q}_ms']:.1f}" for q in PERCENTILES] + [f"{s['max_ms']:.1f}"]
+            lines.append("| " + " | ".join(str(v) for v in row) + " |")
+    else:
+        lines.append("No files were processed.")
+    lines += ["", "## Excel update", ""]
+    if summary["excel_s"]:
+        lines += ["| Phase | Seconds |", "| --- | --- |"]
+        lines += [f"| {phase} | {seconds:.2f} |" for phase, seconds in summary["excel_s"].items()]
+    else:
+        lines.append("The workbook was not updated.")
+    if summary["slowest_files"]:
+        lines += ["", "## Slowest files", "", "| File | Total ms | Cache | Stages (ms) |", "| --- | --- | --- | --- |"]
+        for f in summary["slowest_files"]:
+            stages = ", ".join(f"{k} {v:.0f}" for k, v in f["stages_ms"].items())
+            lines.append(f"| {f['filename']} | {f['total_ms']:.0f} | {f['cache_hit'] or '-'} | {stages} |")
+    return "\n".join(lines) + "\n"
@@ -1,16 +1,21 @@
 # processing_engine.py
-import shutil, time, json, openpyxl, re
-from queue import Queue
+import time, os, signal, threading
+from multiprocessing.managers import SyncManager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from queue import Queue, Empty
 from pathlib import Path
 from datetime import datetime
-from openpyxl.styles import PatternFill, Alignment
-from openpyxl.utils import get_column_letter
 
 from config import *
+from cache_utils import ExtractionCache, DuplicateFinder, file_digest
+from results_sidecar import ResultsSidecar, sidecar_path_for
+from progress_batcher import ProgressBatcher
+from perf_report import StageTimer, PerformanceReport
 from custom_exceptions import FileLockError
-from data_harvesters import harvest_all_data
-from file_utils import is_file_locked
-from ocr_utils import extract_text_from_pdf, _is_ocr_needed
+from data_harvesters import harvest_all_data, is_confident_harvest, pattern_registry
+from file_utils import is_file_locked, discover_pdfs
+from ocr_utils import extract_pdf_pages, join_page_texts, refine_ocr_pages, configure_ocr_concurrency
+from logging_utils import LOG_DIR
 
 def clear_review_folder():
     if PDF_TXT_DIR.exists():
@@ -20,73 +25,329 @@ def clear_review_folder():
             except OSError as e:
                 print(f"Error deleting review file {f}: {e}")
 
-def get_cache_path(pdf_path):
-    try:
-        return CACHE_DIR / f"{pdf_path.stem}_{pdf_path.stat().st_size}.json"
-    except FileNotFoundError:
-        return CACHE_DIR / f"{pdf_path.stem}_unknown.json"
-
-# --- UPDATED FUNCTION ---
-def process_single_pdf(pdf_path, progress_queue, ignore_cache=False):
+def process_single_pdf(pdf_path, progress_queue, ignore_cache=False, cache=None, early_exit=False, adaptive_dpi=False, patterns=None):
+    """Extracts and harvests one PDF; the result also carries its per-stage "timings"."""
     # Ensure pdf_path is a Path object for consistency
     pdf_path = Path(pdf_path)
     filename = pdf_path.name
-    cache_path = get_cache_path(pdf_path)
+    if patterns is None:
+        patterns = pattern_registry.current()
+    if cache is None:
+        cache = ExtractionCache(pattern_version=patterns.fingerprint)
+    timer = StageTimer()
+    try:
+        with timer.stage("cache_io"):
+            digest = file_digest(pdf_path)
+    except OSError as e:
+        progress_queue.put({"type": "log", "tag": "warning", "msg": f"Could not read {filename} for caching: {e}"})
+        digest = None
 
     # FIX: Announce which file is being processed for live feedback in the terminal
     progress_queue.put({"type": "log", "tag": "info", "msg": f"Processing: {filename}"})
     
-    if not ignore_cache and cache_path.exists():
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-            if "status" not in cached_data:
-                raise KeyError
-            
-            progress_queue.put({"type": "log", "tag": "info", "msg": f"Loaded from cache: {filename}"})
-            if cached_data.get("status") == "Needs Review":
-                progress_queue.put({"type": "review_item", "data": cached_data.get("review_info")})
-            progress_queue.put({"type": "file_complete", "status": cached_data.get("status")})
-            if cached_data.get("ocr_used"):
-                progress_queue.put({"type": "increment_counter", "counter": "ocr"})
-            return cached_data
-        except (json.JSONDecodeError, KeyError):
-             progress_queue.put({"type": "log", "tag": "warning", "msg": f"Corrupt cache for {filename}. Reprocessing..."})
+    with timer.stage("cache_io"):
+        cached_data = cache.get_harvest(digest) if digest and not ignore_cache else None
+    if cached_data is not None and cached_data.get("pages_skipped") and not early_exit:
+        cached_data = None
+    if cached_data is not None and cached_data.get("status") == "Needs Review":
+        # PDF_TXT is cleared when the app closes, so the review copy is rewritten from the cached text.
+        with timer.stage("cache_io"):
+            cached_text = cache.get_text(digest)
+        if cached_text is None:
+            cached_data = None
+    if cached_data is not None:
+        # Entries are shared by content, so the same bytes may have been cached under another name.
+        cached_data = result_for_copy(cached_data, pdf_path)
+        if cached_data.get("status") == "Needs Review":
+            write_review_text(pdf_path, join_page_texts(cached_text))
+        progress_queue.put({"type": "log", "tag": "info", "msg": f"Loaded from cache: {filename}"})
+        if cached_data.get("status") == "Needs Review":
+            progress_queue.put({"type": "review_item", "data": cached_data.get("review_info")})
+        progress_queue.put({"type": "file_complete", "status": cached_data.get("status")})
+        if cached_data.get("ocr_used"):
+            progress_queue.put({"type": "increment_counter", "counter": "ocr"})
+        return {**cached_data, "cache_hit": "harvest", "timings": timer.seconds}
 
     progress_queue.put({"type": "status", "msg": filename, "led": "Queued"})
-    
-    # FIX: Pass the absolute string path to the OCR utility to prevent file open errors
-    absolute_pdf_path = str(pdf_path.resolve())
-    
-    ocr_required = _is_ocr_needed(absolute_pdf_path)
-    if ocr_required:
-        progress_queue.put({"type": "status", "msg": filename, "led": "OCR"})
-        progress_queue.put({"type": "increment_counter", "counter": "ocr"})
-    
-    extracted_text = extract_text_from_pdf(absolute_pdf_path)
+
+    # The text layer survives pattern edits and reruns, so only new content pays for extraction/OCR.
+    with timer.stage("cache_io"):
+        extraction = cache.get_text(digest) if digest else None
+    if extraction and extraction.get("pages_skipped") and (ignore_cache or not early_exit):
+        # Partial text from a harvest-driven run; a full run or a rerun needs every page.
+        extraction = None
+    if extraction and any(p.get("source") == "ocr_missing" for p in extraction["pages"]):
+        extraction = None
+    text_cached = extraction is not None
+    if text_cached:
+        progress_queue.put({"type": "log", "tag": "info", "msg": f"Re-harvesting cached text: {filename}"})
+        if extraction.get("ocr_used"):
+            progress_queue.put({"type": "increment_counter", "counter": "ocr"})
+    else:
+        def announce_ocr():
+            progress_queue.put({"type": "status", "msg": filename, "led": "OCR"})
+            progress_queue.put({"type": "increment_counter", "counter": "ocr"})
+
+        # FIX: Pass the absolute string path to the OCR utility to prevent file open errors
+        stop_when = (lambda text: is_confident_harvest(text, filename, patterns)) if early_exit else None
+        extraction = extract_pdf_pages(str(pdf_path.resolve()), on_ocr_start=announce_ocr,
+                                       stop_when=stop_when, max_ocr_pages=EARLY_EXIT_MAX_OCR_PAGES,
+                                       dpi_ladder=OCR_DPI_LADDER if adaptive_dpi else None, timer=timer)
+        if digest and join_page_texts(extraction).strip() and not extraction.get("pages_ocr_missing"):
+            with timer.stage("cache_io"):
+                _store_text(cache, digest, extraction, filename, progress_queue)
+
+    ocr_required = extraction.get("ocr_used", False)
+    page_counts = {key: extraction.get(key, 0) for key in ("pages_ocr", "pages_native", "pages_skipped", "pages_ocr_missing")}
+    extracted_text = join_page_texts(extraction)
     if not extracted_text.strip():
-        result = {"filename": filename, "models": "Error: Text Extraction Failed", "author": "", "status": "Fail", "ocr_used": ocr_required, "review_info": None}
+        result = {"filename": filename, "models": "Error: Text Extraction Failed", "author": "", "status": "Fail", "ocr_used": ocr_required, **page_counts, "pattern_snapshot": patterns.fingerprint, "review_info": None}
     else:
         progress_queue.put({"type": "status", "msg": filename, "led": "AI"})
-        data = harvest_all_data(extracted_text, filename)
+        with timer.stage("harvest"):
+            data = harvest_all_data(extracted_text, filename, patterns)
+        if data["models"] == "Not Found" and adaptive_dpi and refine_ocr_pages(pdf_path, extraction, max(OCR_DPI_LADDER), timer=timer):
+            progress_queue.put({"type": "log", "tag": "info", "msg": f"No models at low resolution, re-OCR'd at {max(OCR_DPI_LADDER)} DPI: {filename}"})
+            extracted_text = join_page_texts(extraction)
+            with timer.stage("harvest"):
+                data = harvest_all_data(extracted_text, filename, patterns)
+            if digest and not extraction.get("pages_ocr_missing"):
+                with timer.stage("cache_io"):
+                    _store_text(cache, digest, extraction, filename, progress_queue)
         if data["models"] == "Not Found":
             status = "Needs Review"
-            review_txt_path = PDF_TXT_DIR / f"{pdf_path.stem}.txt"
-            with open(review_txt_path, 'w', encoding='utf-8') as f:
-                f.write(f"--- Filename: {filename} ---\n\n{extracted_text}")
+            review_txt_path = write_review_text(pdf_path, extracted_text)
             review_info = {"filename": filename, "reason": "No models", "txt_path": str(review_txt_path), "pdf_path": str(pdf_path)}
             progress_queue.put({"type": "review_item", "data": review_info})
         else:
             status = "Pass"
             review_info = None
-        result = {"filename": filename, **data, "status": status, "ocr_used": ocr_required, "review_info": review_info}
+        result = {"filename": filename, **data, "status": status, "ocr_used": ocr_required, **page_counts, "pattern_snapshot": patterns.fingerprint, "review_info": review_info}
 
-    with open(cache_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f)
+    # Failures and results from pages that could not be OCR'd are not cached: a later run with
+    # working OCR should see the whole document.
+    if digest and result["status"] != "Fail" and not page_counts["pages_ocr_missing"]:
+        try:
+            with timer.stage("cache_io"):
+                cache.put_harvest(digest, result)
+        except OSError as e:
+            progress_queue.put({"type": "log", "tag": "warning", "msg": f"Could not write cache for {filename}: {e}"})
     progress_queue.put({"type": "file_complete", "status": result["status"]})
+    return {**result, "cache_hit": "text" if text_cached else None, "timings": timer.seconds}
+
+def review_text_path(pdf_path):
+    return PDF_TXT_DIR / f"{Path(pdf_path).stem}.txt"
+
+def write_review_text(pdf_path, text):
+    """Writes the text of a file that needs review to PDF_TXT for the review window; returns the path."""
+    review_txt_path = review_text_path(pdf_path)
+    with open(review_txt_path, 'w', encoding='utf-8') as f:
+        f.write(f"--- Filename: {Path(pdf_path).name} ---\n\n{text}")
+    return review_txt_path
+
+def result_for_copy(result, pdf_path):
+    """Returns `result` relabelled for `pdf_path`, a file with the same bytes under another name."""
+    pdf_path = Path(pdf_path)
+    result = {**result, "filename": pdf_path.name}
+    if result.get("review_info"):
+        review_info = {**result["review_info"], "filename": pdf_path.name, "pdf_path": str(pdf_path), "txt_path": str(review_text_path(pdf_path))}
+        source = Path(result["review_info"].get("txt_path") or "")
+        if source.is_file() and source != Path(review_info["txt_path"]):
+            text = source.read_text(encoding="utf-8")
+            write_review_text(pdf_path, text.split("\n\n", 1)[-1] if text.startswith("--- Filename:") else text)
+        result["review_info"] = review_info
     return result
 
+def _store_text(cache, digest, extraction, filename, progress_queue):
+    try:
+        cache.put_text(digest, extraction)
+    except OSError as e:
+        progress_queue.put({"type": "log", "tag": "warning", "msg": f"Could not write text cache for {filename}: {e}"})
+
+def _write_performance_report(report, progress_queue):
+    try:
+        _, md_path = report.write(LOG_DIR)
+    except OSError as e:
+        progress_queue.put({"type": "log", "tag": "warning", "msg": f"Could not write performance report: {e}"})
+        return
+    progress_queue.put({"type": "log", "tag": "info", "msg": f"Performance report: {md_path} (+ .json)"})
+
+def resolve_worker_count(requested=None):
+    """Returns how many worker processes a job should use (0/None = one per CPU core)."""
+    if requested is None:
+        requested = PROCESSING_WORKERS
+    if not requested or requested < 1:
+        return os.cpu_count() or 1
+    return int(requested)
+
+def resolve_page_workers(file_workers, requested=None):
+    """Returns the page-level OCR threads per file worker, keeping file x page within the core count."""
+    if requested is None:
+        requested = OCR_PAGE_WORKERS
+    if requested and requested > 0:
+        return int(requested)
+    return max(1, (os.cpu_count() or 1) // max(1, file_workers))
+
+class FileFeed:
+    """Hands files to the processing loop while `source` is still being walked on a background thread."""
+
+    def __init__(self, source, accept=None):
+        self._queue = Queue()
+        self._accept = accept
+        self.discovered = 0
+        self.found = 0
+        self.accepted = 0
+        self.reported_total = None
+        self.exhausted = False
+        threading.Thread(target=self._discover, args=(source,), daemon=True).start()
+
+    @property
+    def total(self) -> int:
+        """Files accepted so far plus those discovered but not yet taken; exact once discovery is over."""
+        return self.accepted + self.discovered - self.found
+
+    def progress(self, current) -> dict:
+        """The progress message for `current` files, against the total as discovery has grown it."""
+        self.reported_total = self.total
+        return {"type": "progress", "current": current, "total": self.reported_total}
+
+    def _discover(self, source):
+        try:
+            for path in source:
+                self.discovered += 1
+                self._queue.put(path)
+        except Exception as e:
+            self._queue.put(e)
+        self._queue.put(None)
+
+    def take(self, timeout=0):
+        """Returns the next accepted file, or None if none arrives within `timeout` seconds or discovery is over."""
+        while not self.exhausted:
+            try:
+                item = self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()
+            except Empty:
+                return None
+            if item is None:
+                self.exhausted = True
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                self.found += 1
+                if self._accept is None or self._accept(item):
+                    self.accepted += 1
+                    return item
+        return None
+
+def _wait_while_paused(progress_queue, cancel_event, pause_event):
+    if pause_event and pause_event.is_set():
+        progress_queue.put({"type": "status", "msg": "Paused", "led": "Paused"})
+        while pause_event.is_set() and not cancel_event.is_set():
+            time.sleep(0.5)
+
+def process_files_sequentially(feed, progress_queue, cancel_event, pause_event, file_options=None, on_result=None):
+    """Processes the files of a FileFeed one at a time; returns results in discovery order."""
+    file_options = file_options or {}
+    processed = []
+    while not cancel_event.is_set():
+        path = feed.take(timeout=0.5)
+        if path is None:
+            if feed.exhausted:
+                break
+            if feed.total != feed.reported_total:
+                progress_queue.put(feed.progress(len(processed)))
+            continue
+        _wait_while_paused(progress_queue, cancel_event, pause_event)
+        if cancel_event.is_set():
+            break
+        progress_queue.put(feed.progress(len(processed) + 1))
+        res = process_single_pdf(path, progress_queue, **file_options)
+        if res is None:
+            res = process_single_pdf(path, progress_queue, **{**file_options, "ignore_cache": True})
+        if res and on_result:
+            on_result(path, res)
+        processed.append(res)
+    return processed
+
+def _forward_progress(source, target):
+    """Relays messages from the worker-shared queue onto the job's progress queue."""
+    while True:
+        msg = source.get()
+        if msg is None:
+            break
+        target.put(msg)
+
+def _ignore_sigint():
+    # Ctrl+C reaches the whole process group; the parent turns it into a cancel and lets
+    # in-flight files finish, so the helper processes must not die on it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _init_worker(page_workers):
+    _ignore_sigint()
+    configure_ocr_concurrency(page_workers)
+
+def process_files_in_pool(feed, progress_queue, cancel_event, pause_event, workers, file_options=None, page_workers=1, on_result=None):
+    """Runs process_single_pdf across a process pool, at most `workers` files at a time; returns results in discovery order."""
+    file_options = file_options or {}
+    outputs = {}
+    completed = 0
+    manager = SyncManager()
+    manager.start(_ignore_sigint)
+    with manager:
+        worker_queue = manager.Queue()
+        forwarder = threading.Thread(target=_forward_progress, args=(worker_queue, progress_queue), daemon=True)
+        forwarder.start()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(page_workers,)) as pool:
+                pending = {}
+                next_index = 0
+                paused_reported = False
+                while pending or not (feed.exhausted or cancel_event.is_set()):
+                    paused = bool(pause_event and pause_event.is_set())
+                    if paused and not paused_reported:
+                        progress_queue.put({"type": "status", "msg": "Paused", "led": "Paused"})
+                    paused_reported = paused
+                    while not paused and not cancel_event.is_set() and len(pending) < workers:
+                        # With nothing in flight, wait briefly for discovery instead of spinning.
+                        path = feed.take(timeout=0 if pending else 0.5)
+                        if path is None:
+                            break
+                        future = pool.submit(process_single_pdf, path, worker_queue, **file_options)
+                        pending[future] = (next_index, path)
+                        next_index += 1
+                    if feed.total != feed.reported_total:
+                        progress_queue.put(feed.progress(completed))
+                    if not pending:
+                        if paused:
+                            time.sleep(0.5)
+                        continue
+                    finished, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index, path = pending.pop(future)
+                        outputs[index] = future.result()
+                        if outputs[index] and on_result:
+                            on_result(path, outputs[index])
+                        completed += 1
+                        progress_queue.put(feed.progress(completed))
+        finally:
+            worker_queue.put(None)
+            forwarder.join()
+    return [outputs[i] for i in sorted(outputs)]
+
 def run_processing_job(job_info, progress_queue, cancel_event, pause_event):
+    """Runs a job, coalescing its progress messages into "batch" events unless `progress_interval` is 0."""
+    interval = job_info.get("progress_interval", PROGRESS_BATCH_INTERVAL)
+    if not interval:
+        return _run_job(job_info, progress_queue, cancel_event, pause_event)
+    batcher = ProgressBatcher(progress_queue, interval)
+    try:
+        _run_job(job_info, batcher, cancel_event, pause_event)
+    finally:
+        batcher.close()
+
+def _run_job(job_info, progress_queue, cancel_event, pause_event):
+    # openpyxl is only needed here, in the parent process; pool workers import this module too.
+    from excel_updater import update_workbook, select_files_for_blank_rows
+    job_started, job_t0 = datetime.now(), time.perf_counter()
     try:
         is_rerun = job_info.get("is_rerun", False)
         excel_path = Path(job_info["excel_path"])
@@ -101,69 +362,141 @@ def run_processing_job(job_info, progress_queue, cancel_event, pause_event):
             cloned_path = OUTPUT_DIR / f"cloned_{excel_path.stem}_{ts}{excel_path.suffix}"
             if is_file_locked(excel_path):
                 raise FileLockError("Input Excel is locked.")
-            shutil.copy(excel_path, cloned_path)
         
-        files = [Path(f) for f in input_path] if isinstance(input_path, list) else list(Path(input_path).glob('*.pdf'))
-        results = {}
-        for i, path in enumerate(files):
-            if cancel_event.is_set():
-                break
-            if pause_event and pause_event.is_set():
-                progress_queue.put({"type": "status", "msg": "Paused", "led": "Paused"})
-                while pause_event.is_set():
-                    time.sleep(0.5)
-            progress_queue.put({"type": "progress", "current": i + 1, "total": len(files)})
-            res = process_single_pdf(path, progress_queue, ignore_cache=is_rerun)
-            if res is None:
-                res = process_single_pdf(path, progress_queue, ignore_cache=True)
-            if res:
-                results[res["filename"]] = res
+        if isinstance(input_path, list):
+            files = [Path(f) for f in input_path]
+        else:
+            files = discover_pdfs(
+                input_path,
+                include=job_info.get("include", DISCOVERY_INCLUDE),
+                exclude=job_info.get("exclude", DISCOVERY_EXCLUDE),
+                min_size=job_info.get("min_size", DISCOVERY_MIN_BYTES),
+                max_size=job_info.get("max_size", DISCOVERY_MAX_BYTES),
+                recursive=job_info.get("recursive", DISCOVERY_RECURSIVE),
+                on_error=lambda e: progress_queue.put({"type": "log", "tag": "warning", "msg": f"Skipped during discovery: {e}"}),
+            )
+        # Flagged rows already hold "Not Found" in Meta, so a rerun must not skip filled rows.
+        fill_blanks_only = not is_rerun and job_info.get("fill_blanks_only", FILL_BLANKS_ONLY)
+        if fill_blanks_only:
+            # The pre-scan needs every file name to resolve nested stems, so discovery completes first here.
+            progress_queue.put({"type": "status", "msg": "Scanning Excel for blank Meta cells...", "led": "Processing"})
+            files = list(files)
+            total_files = len(files)
+            files, blank_rows = select_files_for_blank_rows(excel_path, files)
+            progress_queue.put({"type": "log", "tag": "info", "msg": f"Fill-blanks mode: {blank_rows} rows have no Meta; processing {len(files)} of {total_files} PDFs."})
+
+        # Byte-identical PDFs are extracted once; their result is copied to the other names.
+        finder = DuplicateFinder()
+        duplicates = {}
+        completed = {}
+        duplicate_results = []
+        # Rows are matched by file stem, so two PDFs with the same name (e.g. in different
+        # subfolders) cannot both be used; the first one found wins and the others are reported.
+        names = {}
+        name_clashes = []
+
+        def add_duplicate(path, res):
+            dup_res = result_for_copy(res, path)
+            if dup_res["status"] == "Needs Review":
+                progress_queue.put({"type": "review_item", "data": dup_res.get("review_info")})
+            progress_queue.put({"type": "file_complete", "status": dup_res["status"]})
+            if sidecar:
+                sidecar.add(path, dup_res)
+            duplicate_results.append(dup_res)
+
+        def accept(path):
+            first = names.setdefault(path.stem.casefold(), path)
+            if first != path:
+                name_clashes.append(path)
+                progress_queue.put({"type": "log", "tag": "warning", "msg": f"Skipped {path}: same name as {first}, which is used instead."})
+                return False
+            original = finder.add(path)
+            if original is None:
+                return True
+            if original in completed:
+                add_duplicate(path, completed[original])
+            else:
+                duplicates.setdefault(original, []).append(path)
+            return False
+
+        def on_result(path, res):
+            completed[path] = res
+            for dup in duplicates.pop(path, ()):
+                add_duplicate(dup, res)
+            if sidecar:
+                sidecar.add(path, res)
+
+        # One pattern snapshot for the whole job: saves in the pattern manager apply to the next run.
+        patterns = pattern_registry.snapshot()
+        cache = ExtractionCache(cache_dir=job_info.get("cache_dir", CACHE_DIR), pattern_version=patterns.fingerprint)
+        workers = resolve_worker_count(job_info.get("workers"))
+        if isinstance(files, list):
+            workers = min(workers, max(1, len(files)))
+        page_workers = resolve_page_workers(workers, job_info.get("page_workers"))
+        file_options = {
+            "ignore_cache": job_info.get("ignore_cache", is_rerun),
+            "cache": cache,
+            "patterns": patterns,
+            "early_exit": job_info.get("early_exit", EARLY_EXIT_OCR),
+            "adaptive_dpi": job_info.get("adaptive_dpi", ADAPTIVE_OCR_DPI),
+        }
+        sidecar = None
+        if job_info.get("sidecar", RESULTS_SIDECAR):
+            sidecar = ResultsSidecar(sidecar_path_for(cloned_path), parquet=job_info.get("sidecar_parquet", RESULTS_SIDECAR_PARQUET))
+            progress_queue.put({"type": "log", "tag": "info", "msg": f"Writing results to {sidecar.path.name} as files complete."})
+        feed = FileFeed(files, accept)
+        try:
+            if workers > 1:
+                progress_queue.put({"type": "log", "tag": "info", "msg": f"Processing with {workers} workers ({page_workers} OCR page threads each)."})
+                processed = process_files_in_pool(feed, progress_queue, cancel_event, pause_event, workers, file_options, page_workers, on_result)
+            else:
+                configure_ocr_concurrency(page_workers)
+                processed = process_files_sequentially(feed, progress_queue, cancel_event, pause_event, file_options, on_result)
+        finally:
+            if sidecar:
+                sidecar.close()
+        if not isinstance(files, list):
+            progress_queue.put({"type": "log", "tag": "info", "msg": f"Discovery {'complete' if feed.exhausted else 'stopped'}: {feed.found} PDFs found."})
+        processed = [res for res in processed if res]
+        results = {res["filename"]: res for res in processed + duplicate_results}
+        for res in processed:
+            cache.record(res.get("cache_hit"))
+        cache.evict()
+        pages_ocr = sum(res.get("pages_ocr", 0) for res in processed)
+        pages_native = sum(res.get("pages_native", 0) for res in processed)
+        pages_skipped = sum(res.get("pages_skipped", 0) for res in processed)
+        pages_ocr_missing = sum(res.get("pages_ocr_missing", 0) for res in processed)
+        progress_queue.put({"type": "log", "tag": "info", "msg": f"Pages: {pages_native} native, {pages_ocr} OCR'd, {pages_skipped} skipped by early exit, {pages_ocr_missing} could not be OCR'd."})
+        progress_queue.put({"type": "log", "tag": "info", "msg": f"Cache: {cache.harvest_hits} results reused, {cache.text_hits} re-harvested from cached text, {cache.misses} extracted."})
+        if duplicate_results:
+            progress_queue.put({"type": "log", "tag": "info", "msg": f"Duplicates: {len(duplicate_results)} identical PDFs collapsed into {len(processed)} extracted documents."})
+        if name_clashes:
+            progress_queue.put({"type": "log", "tag": "warning", "msg": f"Name clashes: {len(name_clashes)} PDFs skipped because another PDF with the same name was found first."})
 
         if cancel_event.is_set():
             progress_queue.put({"type": "finish", "status": "Cancelled"})
             return
 
         progress_queue.put({"type": "status", "msg": "Updating Excel...", "led": "Saving"})
-        workbook = openpyxl.load_workbook(cloned_path)
-        sheet = workbook.active
-        headers = [c.value for c in sheet[1]]
-        if STATUS_COLUMN_NAME not in headers:
-            sheet.cell(row=1, column=len(headers) + 1).value = STATUS_COLUMN_NAME
-            headers.append(STATUS_COLUMN_NAME)
-        cols = {h: headers.index(h) + 1 for h in [DESCRIPTION_COLUMN_NAME, META_COLUMN_NAME, AUTHOR_COLUMN_NAME, STATUS_COLUMN_NAME]}
-       
-        for row in sheet.iter_rows(min_row=2):
-            desc = str(row[cols[DESCRIPTION_COLUMN_NAME]-1].value)
-            for filename, data in results.items():
-                if Path(filename).stem in desc:
-                    row[cols[META_COLUMN_NAME]-1].value = data["models"]
-                    row[cols[AUTHOR_COLUMN_NAME]-1].value = data["author"]
-                    row[cols[STATUS_COLUMN_NAME]-1].value = f"{data['status']}{' (OCR)' if data['ocr_used'] else ''}"
-                    break
-        
-        progress_queue.put({"type": "status", "msg": "Applying formatting...", "led": "Saving"})
-        fills = {
-            "Pass": PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
-            "Fail": PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
-            "Needs Review": PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),
-            "OCR": PatternFill(start_color="0A9BCD", end_color="0A9BCD", fill_type="solid")
-        }
-        
-        for row in sheet.iter_rows(min_row=2):
-            status_val = str(row[cols[STATUS_COLUMN_NAME]-1].value)
-            fill_key = status_val.replace(" (OCR)", "").strip()
-            fill = fills.get(fill_key)
-            if fill:
-                for cell in row:
-                    cell.fill = fill
-            if "(OCR)" in status_val:
-                row[cols[STATUS_COLUMN_NAME]-1].fill = fills["OCR"]
-        
-        for i, col in enumerate(sheet.columns, 1):
-            max_len = max((len(str(c.value)) for c in col if c.value), default=0)
-            sheet.column_dimensions[get_column_letter(i)].width = (max_len + 2) if max_len < 60 else 60
+        plan = update_workbook(excel_path, cloned_path, results, fill_blanks_only)
+        progress_queue.put({"type": "log", "tag": "info", "msg": f"Excel: {len(plan.changes)} of {plan.row_count} rows updated."})
+        if plan.streamed:
+            progress_queue.put({"type": "log", "tag": "warning", "msg": f"Excel: {plan.row_count} rows is over EXCEL_STREAMING_WRITE_ROWS, so the workbook was rewritten in low-memory mode; only values, header styles and column widths were kept."})
+        if plan.ambiguous:
+            progress_queue.put({"type": "log", "tag": "warning", "msg": f"{len(plan.ambiguous)} rows match more than one file and were left unchanged."})
+            for row_number, matches in plan.ambiguous[:20]:
+                progress_queue.put({"type": "log", "tag": "warning", "msg": f"  Row {row_number}: {', '.join(matches)}"})
+
+        if job_info.get("performance_report", PERFORMANCE_REPORT):
+            report = PerformanceReport(job_started)
+            report.wall_seconds = time.perf_counter() - job_t0
+            report.info = {"workers": workers, "page_workers": page_workers, "cache_harvest_hits": cache.harvest_hits,
+                           "cache_text_hits": cache.text_hits, "cache_misses": cache.misses}
+            for res in processed:
+                report.add_file(res["filename"], res.get("timings"), res.get("cache_hit"))
+            report.excel = plan.timings.seconds
+            _write_performance_report(report, progress_queue)
 
-        workbook.save(cloned_path)
         progress_queue.put({"type": "result_path", "path": str(cloned_path)})
         progress_queue.put({"type": "finish", "status": "Complete"})
 
@@ -0,0 +1,72 @@
+# progress_batcher.py
+import threading
+import time
+
+# Message types folded into batches; anything else (result_path, finish) is passed through
+# in order, right after the batch that precedes it.
+COALESCED_TYPES = {"log", "status", "progress", "increment_counter", "file_complete", "review_item"}
+
+class ProgressBatcher:
+    """
+    Queue-like front for a job's progress queue that coalesces the per-file messages into
+    at most one "batch" event per `interval` seconds:
+
+        {"type": "batch", "logs": [(tag, msg), ...], "status": {"msg", "led"} or None,
+         "progress": {"current", "total"} or None, "counters": {name: delta},
+         "review_items": [...]}
+
+    Only the latest status and progress survive a batch; counter increments are summed
+    (file_complete statuses are counted under their lower-case, underscored name) and log
+    lines and review items are kept in order. `put` is thread-safe. A background thread
+    flushes pending messages so they are not held back while the engine is busy; `close`
+    flushes what is left and stops it.
+    """
+
+    def __init__(self, target, interval=0.25):
+        self.target = target
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = None
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._run, daemon=True)
+        self._flusher.start()
+
+    def put(self, msg):
+        with self._lock:
+            if msg.get("type") not in COALESCED_TYPES:
+                self._flush_locked()
+                self.target.put(msg)
+                return
+            batch = self._pending
+            if batch is None:
+                batch = self._pending = {"type": "batch", "logs": [], "status": None, "progress": None, "counters": {}, "review_items": []}
+            mtype = msg["type"]
+            if mtype == "log":
+                batch["logs"].append((msg.get("tag", "info"), msg.get("msg", "")))
+            elif mtype == "status":
+                batch["status"] = {"msg": msg.get("msg", ""), "led": msg.get("led")}
+            elif mtype == "progress":
+                batch["progress"] = {"current": msg.get("current", 0), "total": msg.get("total", 1)}
+            elif mtype == "review_item":
+                batch["review_items"].append(msg.get("data", {}))
+            else:
+                name = msg.get("counter") if mtype == "increment_counter" else msg.get("status", "").lower().replace(" ", "_")
+                batch["counters"][name] = batch["counters"].get(name, 0) + 1
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending is not None:
+            self.target.put(self._pending)
+            self._pending = None
+
+    def _run(self):
+        while not self._closed.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
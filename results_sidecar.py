@@ -0,0 +1,76 @@
+# results_sidecar.py
+import csv
+import os
+from pathlib import Path
+
+from logging_utils import setup_logger, log_info, log_warning
+
+logger = setup_logger("results_sidecar")
+
+SIDECAR_FIELDS = [
+    "filename", "models", "author", "status", "ocr_used",
+    "pages_native", "pages_ocr", "pages_skipped", "pages_ocr_missing", "cache_hit", "source_path",
+]
+
+def sidecar_path_for(workbook_path) -> Path:
+    """The results CSV that belongs to an output workbook: `<stem>_results.csv` beside it."""
+    workbook_path = Path(workbook_path)
+    return workbook_path.with_name(f"{workbook_path.stem}_results.csv")
+
+class ResultsSidecar:
+    """
+    Plain-table copy of the job's results for scripts that only need filename → models,
+    author and status. One CSV row is written and flushed as each file completes, so the
+    file can be read while the job is still running. When the sidecar already exists (a
+    rerun of flagged files), rows are appended and `close` keeps only the newest row per
+    filename. With `parquet=True` a Parquet copy is written on close, if pandas has a
+    Parquet engine available.
+    """
+
+    def __init__(self, path, parquet=False):
+        self.path = Path(path)
+        self.parquet = parquet
+        self.rows_written = 0
+        self._appending = self.path.exists() and self.path.stat().st_size > 0
+        self._file = open(self.path, "a" if self._appending else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=SIDECAR_FIELDS, extrasaction="ignore")
+        if not self._appending:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def add(self, source_path, result: dict) -> None:
+        self._writer.writerow({**result, "source_path": str(source_path)})
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if self._appending:
+            self._compact()
+        if self.parquet:
+            self._write_parquet()
+        log_info(logger, f"Results sidecar written: {self.path} ({self.rows_written} rows this run)")
+
+    def _compact(self) -> None:
+        with open(self.path, newline="", encoding="utf-8") as f:
+            latest = {row["filename"]: row for row in csv.DictReader(f)}
+        tmp_path = self.path.with_suffix(".csv.tmp")
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=SIDECAR_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(latest.values())
+        os.replace(tmp_path, self.path)
+
+    def _write_parquet(self) -> None:
+        import pandas as pd
+        try:
+            pd.read_csv(self.path, dtype=str, keep_default_na=False).to_parquet(self.path.with_suffix(".parquet"), index=False)
+        except ImportError as e:
+            log_warning(logger, f"Parquet sidecar skipped, no Parquet engine installed: {str(e).splitlines()[0]}")
+
+def read_sidecar(path) -> list:
+    """Returns the sidecar's rows as dicts (all values as strings)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))